@@ -34,13 +34,15 @@ extras_require = {
     # the following are intended for use by the photini-configure script
     'PySide2'  : ['PySide2'],
     'PySide6'  : ['PySide6'],
-    'gpxpy'    : ['gpxpy'],
+    'gpx'      : ['numpy'],
     'Pillow'   : ['Pillow'],
     }
+# old name of 'gpx', for compatibility
+extras_require['gpxpy'] = list(extras_require['gpx'])
 extras_require['extras'] = list(
     set(extras_require['flickr']) | set(extras_require['google']) |
     set(extras_require['importer']) | set(extras_require['ipernity']) |
-    set(extras_require['spelling']) | set(['gpxpy', 'Pillow']))
+    set(extras_require['spelling']) | set(['numpy', 'Pillow']))
 extras_require['win7'] = list(
     set(extras_require['basic']) | set(extras_require['extras']))
 extras_require['win10'] = extras_require['win7']
@@ -48,7 +50,7 @@ extras_require['win10'] = extras_require['win7']
 # add version numbers
 min_version = {
     'appdirs': '1.3', 'cachetools': '3.0', 'chardet': '3.0', 'exiv2': '0.14',
-    'gphoto2': '1.8.0', 'gpxpy': '1.3.5', 'keyring': '7.0', 'Pillow': '2.0.0',
+    'gphoto2': '1.8.0', 'keyring': '7.0', 'numpy': '1.17', 'Pillow': '2.0.0',
     'pyenchant': '2.0', 'PyQt5': '5.9', 'PySide2': '5.11.0', 'PySide6': '6.2.0',
     'requests': '2.4.0', 'requests-oauthlib': '1.0', 'requests-toolbelt': '0.9',
     }
@@ -42,8 +42,6 @@ function loadMap(lat, lng, zoom)
         map.layers.insert(layers[i]);
     }
     Microsoft.Maps.loadModule('Microsoft.Maps.SpatialMath');
-    Microsoft.Maps.Events.addHandler(layers[0], 'click', markerClick);
-    Microsoft.Maps.Events.addHandler(layers[1], 'click', markerClick);
     Microsoft.Maps.Events.addHandler(map, 'viewchangeend', newBounds);
     map.getCredentials(newCredentials);
 }
@@ -155,6 +153,15 @@ function clearGPS()
     layers[3].clear();
 }
 
+function setMarkerIcon(marker, icon)
+{
+    if (marker.metadata.cluster)
+        marker.setOptions(
+            {color: icon == '../map_pin_red.png' ? '#e03020' : '#808080'});
+    else
+        marker.setOptions({icon: icon});
+}
+
 function adjustMarker(id, fromLayer, toLayer, icon)
 {
     var markers = fromLayer.getPrimitives();
@@ -164,7 +171,7 @@ function adjustMarker(id, fromLayer, toLayer, icon)
         if (marker.metadata.id == id)
         {
             fromLayer.remove(marker);
-            marker.setOptions({icon: icon});
+            setMarkerIcon(marker, icon);
             toLayer.add(marker);
             return;
         }
@@ -195,11 +202,27 @@ function addMarker(id, lat, lng, active)
     }
     else
         layers[0].add(marker);
+    Microsoft.Maps.Events.addHandler(marker, 'click', markerClick);
     Microsoft.Maps.Events.addHandler(marker, 'dragstart', markerClick);
     Microsoft.Maps.Events.addHandler(marker, 'drag', markerDrag);
     Microsoft.Maps.Events.addHandler(marker, 'dragend', markerDragEnd);
 }
 
+function addCluster(id, lat, lng, active, count)
+{
+    var marker = new Microsoft.Maps.Pushpin(
+        new Microsoft.Maps.Location(lat, lng), {
+            text : String(count),
+            color: active ? '#e03020' : '#808080'
+        });
+    marker.metadata = {id: id, cluster: true};
+    if (active)
+        layers[1].add(marker);
+    else
+        layers[0].add(marker);
+    Microsoft.Maps.Events.addHandler(marker, 'click', markerClick);
+}
+
 function markerClick(event)
 {
     var marker = event.target;
@@ -240,3 +263,51 @@ function delMarker(id)
             }
     }
 }
+
+function updateMarkers(added, deleted, enabled)
+{
+    if (deleted.length)
+    {
+        // remove all deleted markers in one pass through each layer
+        var ids = {};
+        for (var i = 0; i < deleted.length; i++)
+            ids[deleted[i]] = true;
+        for (var j = 0; j < layers.length; j++)
+        {
+            var markers = layers[j].getPrimitives();
+            var remove = [];
+            for (var i = 0; i < markers.length; i++)
+                if (ids[markers[i].metadata.id])
+                    remove.push(markers[i]);
+            if (remove.length)
+                layers[j].remove(remove);
+        }
+    }
+    for (var i = 0; i < added.length; i++)
+    {
+        if (added[i].length > 4)
+            addCluster(added[i][0], added[i][1], added[i][2], added[i][3],
+                       added[i][4]);
+        else
+            addMarker(added[i][0], added[i][1], added[i][2], added[i][3]);
+    }
+    if (enabled.length)
+    {
+        // move markers between layers in one pass through each layer
+        var active = {};
+        for (var i = 0; i < enabled.length; i++)
+            active[enabled[i][0]] = enabled[i][1];
+        var off = layers[0].getPrimitives().filter(function(marker) {
+            return active[marker.metadata.id] === 1;});
+        var on = layers[1].getPrimitives().filter(function(marker) {
+            return active[marker.metadata.id] === 0;});
+        layers[0].remove(off);
+        layers[1].remove(on);
+        for (var i = 0; i < off.length; i++)
+            setMarkerIcon(off[i], '../map_pin_red.png');
+        for (var i = 0; i < on.length; i++)
+            setMarkerIcon(on[i], '../map_pin_grey.png');
+        layers[1].add(off);
+        layers[0].add(on);
+    }
+}
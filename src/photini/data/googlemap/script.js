@@ -133,10 +133,19 @@ function clearGPS()
     gpsMarkers = {};
 }
 
+function clusterIcon(active)
+{
+    return {path: google.maps.SymbolPath.CIRCLE, scale: 14,
+            fillColor: active ? '#e03020' : '#808080', fillOpacity: 0.9,
+            strokeColor: 'white', strokeWeight: 2};
+}
+
 function enableMarker(id, active)
 {
     var marker = markers[id];
-    if (active)
+    if (marker.cluster)
+        marker.setOptions({icon: clusterIcon(active), zIndex: active ? 1 : 0});
+    else if (active)
         marker.setOptions({icon: icon_on, zIndex: 1});
     else
         marker.setOptions({icon: icon_off, zIndex: 0});
@@ -159,6 +168,19 @@ function addMarker(id, lat, lng, active)
     enableMarker(id, active)
 }
 
+function addCluster(id, lat, lng, active, count)
+{
+    var marker = new google.maps.Marker({
+        label: {text: String(count), color: 'white', fontSize: '11px'},
+        position: new google.maps.LatLng(lat, lng),
+        map: map,
+        });
+    marker.cluster = true;
+    markers[id] = marker;
+    google.maps.event.addListener(marker, 'click', markerClick);
+    enableMarker(id, active)
+}
+
 function markerToId(marker)
 {
     for (var id in markers)
@@ -206,3 +228,19 @@ function delMarker(id)
     markers[id].setMap(null);
     delete markers[id];
 }
+
+function updateMarkers(added, deleted, enabled)
+{
+    for (var i = 0; i < deleted.length; i++)
+        delMarker(deleted[i]);
+    for (var i = 0; i < added.length; i++)
+    {
+        if (added[i].length > 4)
+            addCluster(added[i][0], added[i][1], added[i][2], added[i][3],
+                       added[i][4]);
+        else
+            addMarker(added[i][0], added[i][1], added[i][2], added[i][3]);
+    }
+    for (var i = 0; i < enabled.length; i++)
+        enableMarker(enabled[i][0], enabled[i][1]);
+}
@@ -137,10 +137,25 @@ function clearGPS()
     gpsMarkers = {};
 }
 
+function clusterIcon(count, active)
+{
+    return L.divIcon({
+        className: '', iconSize: [28, 28], iconAnchor: [14, 14],
+        html: '<div style="width: 24px; height: 24px; border-radius: 50%;' +
+            ' border: 2px solid white; color: white; font: 11px sans-serif;' +
+            ' line-height: 24px; text-align: center; background: ' +
+            (active ? '#e03020' : '#808080') + '">' + count + '</div>'});
+}
+
 function enableMarker(id, active)
 {
     var marker = markers[id];
-    if (active)
+    if (marker.cluster)
+    {
+        marker.setZIndexOffset(active ? 1000 : 0);
+        marker.setIcon(clusterIcon(marker.cluster, active));
+    }
+    else if (active)
     {
         marker.setZIndexOffset(1000);
         if (id != drag_id)
@@ -165,6 +180,16 @@ function addMarker(id, lat, lng, active)
     enableMarker(id, active)
 }
 
+function addCluster(id, lat, lng, active, count)
+{
+    var marker = L.marker([lat, lng]);
+    marker.cluster = count;
+    marker.addTo(map);
+    markers[id] = marker;
+    marker.on('click', markerClick);
+    enableMarker(id, active)
+}
+
 function markerToId(marker)
 {
     for (var id in markers)
@@ -212,3 +237,19 @@ function delMarker(id)
     map.removeLayer(markers[id]);
     delete markers[id];
 }
+
+function updateMarkers(added, deleted, enabled)
+{
+    for (var i = 0; i < deleted.length; i++)
+        delMarker(deleted[i]);
+    for (var i = 0; i < added.length; i++)
+    {
+        if (added[i].length > 4)
+            addCluster(added[i][0], added[i][1], added[i][2], added[i][3],
+                       added[i][4]);
+        else
+            addMarker(added[i][0], added[i][1], added[i][2], added[i][3]);
+    }
+    for (var i = 0; i < enabled.length; i++)
+        enableMarker(enabled[i][0], enabled[i][1]);
+}
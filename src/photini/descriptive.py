@@ -293,11 +293,7 @@ class TabWidget(QtWidgets.QScrollArea):
     def _update_widget(self, key, images):
         if not images:
             return
-        values = []
-        for image in images:
-            value = getattr(image.metadata, key)
-            if value not in values:
-                values.append(value)
+        values = self.app.image_list.distinct_values(images, key)
         if len(values) > 1:
             self.widgets[key].set_multiple(choices=[x for x in values if x])
         else:
@@ -129,6 +129,30 @@ class EditSettings(QtWidgets.QDialog):
         button_group.addButton(button)
         button.setChecked(keep_time=='now')
         panel.layout().addRow('', button)
+        # check saved files
+        verify = self.config_store.get('files', 'verify', 'full')
+        button_group = QtWidgets.QButtonGroup(parent=self)
+        self.verify_full = QtWidgets.QRadioButton(
+            translate('EditSettings', 'Read whole file again'))
+        button_group.addButton(self.verify_full)
+        self.verify_full.setChecked(verify == 'full')
+        panel.layout().addRow(
+            translate('EditSettings', 'Check saved files'), self.verify_full)
+        self.verify_quick = QtWidgets.QRadioButton(
+            translate('EditSettings', 'Quick check'))
+        button_group.addButton(self.verify_quick)
+        self.verify_quick.setChecked(verify == 'quick')
+        panel.layout().addRow('', self.verify_quick)
+        self.verify_background = QtWidgets.QRadioButton(
+            translate('EditSettings', 'Check after saving all files'))
+        button_group.addButton(self.verify_background)
+        self.verify_background.setChecked(verify == 'background')
+        panel.layout().addRow('', self.verify_background)
+        self.verify_none = QtWidgets.QRadioButton(
+            translate('EditSettings', "Don't check"))
+        button_group.addButton(self.verify_none)
+        self.verify_none.setChecked(verify == 'none')
+        panel.layout().addRow('', self.verify_none)
         # import GPX altitude
         if self.app.gpx_importer:
             self.gpx_altitude = QtWidgets.QCheckBox(
@@ -137,6 +161,17 @@ class EditSettings(QtWidgets.QDialog):
                 self.config_store.get('map', 'gpx_altitude', True))
             panel.layout().addRow(
                 translate('EditSettings', 'GPX importer'), self.gpx_altitude)
+            self.gpx_max_gap = QtWidgets.QSpinBox()
+            self.gpx_max_gap.setRange(1, 24 * 3600)
+            self.gpx_max_gap.setSuffix(translate('EditSettings', ' s'))
+            self.gpx_max_gap.setValue(
+                self.config_store.get('map', 'gpx_max_gap', 600))
+            layout = QtWidgets.QHBoxLayout()
+            layout.addWidget(QtWidgets.QLabel(
+                translate('EditSettings', 'max time gap')))
+            layout.addWidget(self.gpx_max_gap)
+            layout.addStretch(1)
+            panel.layout().addRow('', layout)
         # add panel to scroll area after its size is known
         scroll_area.setWidget(panel)
 
@@ -180,7 +215,18 @@ class EditSettings(QtWidgets.QDialog):
         else:
             keep_time = 'now'
         self.config_store.set('files', 'preserve_timestamps', keep_time)
+        if self.verify_quick.isChecked():
+            verify = 'quick'
+        elif self.verify_background.isChecked():
+            verify = 'background'
+        elif self.verify_none.isChecked():
+            verify = 'none'
+        else:
+            verify = 'full'
+        self.config_store.set('files', 'verify', verify)
         if self.app.gpx_importer:
             self.config_store.set(
                 'map', 'gpx_altitude', self.gpx_altitude.isChecked())
+            self.config_store.set(
+                'map', 'gpx_max_gap', self.gpx_max_gap.value())
         return self.accept()
@@ -56,7 +56,7 @@ class MetadataHandler(object):
             if prefix not in registered:
                 exiv2.XmpProperties.registerNs(ns, prefix)
 
-    def __init__(self, path=None, buf=None):
+    def __init__(self, path=None, buf=None, transcode=True):
         self._path = path
         # read metadata
         if buf:
@@ -71,6 +71,9 @@ class MetadataHandler(object):
         self._exifData = self._image.exifData()
         self._iptcData = self._image.iptcData()
         self._xmpData = self._image.xmpData()
+        # index of XMP data is created when first needed
+        self._xmp_index = None
+        self._xmp_stale = set()
         access_mode = {
             'exif': self._image.checkMode(exiv2.MetadataId.Exif),
             'iptc': self._image.checkMode(exiv2.MetadataId.Iptc),
@@ -94,6 +97,25 @@ class MetadataHandler(object):
                 and str(self._exifData[tag].value()).startswith('Photini')):
             del self._exifData[tag]
         # transcode any non utf-8 strings (Xmp is always utf-8)
+        if transcode:
+            self.transcode()
+        # assume no XMP thumbnails to replace or append
+        self._xmp_thumb_idx = None
+        # mapping Xmp data to type_id, initialised with some that exiv2
+        # doesn't know, extended with ones read from files
+        self._xmp_type_id = {
+            'Xmp.iptc.AltTextAccessibility': exiv2.TypeId.langAlt,
+            'Xmp.iptc.ExtDescrAccessibility': exiv2.TypeId.langAlt,
+            'Xmp.iptcExt.ImageRegion': exiv2.TypeId.xmpBag,
+            'Iptc4xmpExt:LocationName': exiv2.TypeId.langAlt,
+            'Iptc4xmpExt:Name': exiv2.TypeId.langAlt,
+            'Iptc4xmpExt:rCtype': exiv2.TypeId.xmpBag,
+            'Iptc4xmpExt:rRole': exiv2.TypeId.xmpBag,
+            'Iptc4xmpExt:rbVertices': exiv2.TypeId.xmpSeq,
+            'Xmp.xmp.Thumbnails': exiv2.TypeId.xmpAlt,
+            }
+
+    def transcode(self):
         encodings = []
         iptc_charset = self.get_iptc_encoding()
         if iptc_charset not in ('utf-8', 'ascii', None):
@@ -144,21 +166,6 @@ class MetadataHandler(object):
                     set_value(key, value[0])
                 else:
                     set_value(key, value)
-        # assume no XMP thumbnails to replace or append
-        self._xmp_thumb_idx = None
-        # mapping Xmp data to type_id, initialised with some that exiv2
-        # doesn't know, extended with ones read from files
-        self._xmp_type_id = {
-            'Xmp.iptc.AltTextAccessibility': exiv2.TypeId.langAlt,
-            'Xmp.iptc.ExtDescrAccessibility': exiv2.TypeId.langAlt,
-            'Xmp.iptcExt.ImageRegion': exiv2.TypeId.xmpBag,
-            'Iptc4xmpExt:LocationName': exiv2.TypeId.langAlt,
-            'Iptc4xmpExt:Name': exiv2.TypeId.langAlt,
-            'Iptc4xmpExt:rCtype': exiv2.TypeId.xmpBag,
-            'Iptc4xmpExt:rRole': exiv2.TypeId.xmpBag,
-            'Iptc4xmpExt:rbVertices': exiv2.TypeId.xmpSeq,
-            'Xmp.xmp.Thumbnails': exiv2.TypeId.xmpAlt,
-            }
 
     def set_xmp_type(self, key, value):
         if value == exiv2.TypeId.xmpText:
@@ -433,14 +440,31 @@ class MetadataHandler(object):
         else:
             result[root] = value
 
-    def get_xmp_value(self, tag):
-        # XMP has a nested structure of arbitrary depth. Exiv2 converts
-        # this to "flat" tag names. This method converts back to nested
-        # dicts and lists.
-        result = {}
+    @staticmethod
+    def _xmp_root(key):
+        return key.split('/')[0].split('[')[0]
+
+    def _xmp_changed(self, key=None):
+        # keep the XMP index coherent with self._xmpData
+        if key is None:
+            self._xmp_index = None
+        elif self._xmp_index is not None:
+            self._xmp_stale.add(self._xmp_root(key))
+
+    def _index_xmp(self, root=None):
+        # Convert XMP data to Python values in a single pass, grouped by
+        # top level tag, so get_xmp_value doesn't have to search all the
+        # data. If root is set only that tag's data is converted.
+        if root:
+            self._xmp_index[root] = []
+            self._xmp_stale.discard(root)
+        else:
+            self._xmp_index = {}
+            self._xmp_stale = set()
         for datum in self._xmpData:
             key = datum.key()
-            if not key.startswith(tag):
+            tag = self._xmp_root(key)
+            if root and tag != root:
                 continue
             value = datum.value()
             type_id = value.typeId()
@@ -465,6 +489,21 @@ class MetadataHandler(object):
                         exiv2.XmpArrayType.xaBag: exiv2.TypeId.xmpBag,
                         exiv2.XmpArrayType.xaSeq: exiv2.TypeId.xmpSeq,
                         }[array_type]
+            self._xmp_index.setdefault(tag, []).append((key, type_id, value))
+
+    def get_xmp_value(self, tag):
+        # XMP has a nested structure of arbitrary depth. Exiv2 converts
+        # this to "flat" tag names. This method converts back to nested
+        # dicts and lists.
+        if self._xmp_index is None:
+            self._index_xmp()
+        elif tag in self._xmp_stale:
+            self._index_xmp(tag)
+        result = {}
+        for key, type_id, value in self._xmp_index.get(tag, []):
+            if isinstance(value, (dict, list)):
+                # don't let caller modify the index
+                value = value.copy()
             self.set_xmp_type(key, type_id)
             self.set_item(result, key, value)
         if tag in result:
@@ -653,6 +692,7 @@ class MetadataHandler(object):
         if not value:
             self.clear_xmp_tag(tag)
             return
+        self._xmp_changed(tag)
         type_id = self.get_xmp_type(tag)
         if type_id == exiv2.TypeId.langAlt:
             self._xmpData[tag] = exiv2.LangAltValue(value)
@@ -708,6 +748,7 @@ class MetadataHandler(object):
         datum = self._xmpData.findKey(key)
         if datum == self._xmpData.end():
             return datum
+        self._xmp_changed(tag)
         value = datum.value()
         type_id = value.typeId()
         if type_id == exiv2.TypeId.xmpText:
@@ -758,6 +799,7 @@ class MetadataHandler(object):
         return True
 
     def clear_gps(self):
+        self._xmp_changed()
         for data in self._exifData, self._xmpData:
             pos = data.begin()
             while pos != data.end():
@@ -772,6 +814,7 @@ class MetadataHandler(object):
         self._image.writeMetadata()
         self._image.readMetadata()
         self._exifData = self._image.exifData()
+        self._xmp_changed()
         self.clear_exif_tag('Exif.Photo.MakerNote')
 
     @staticmethod
@@ -784,6 +827,7 @@ class MetadataHandler(object):
             image.writeMetadata()
 
     def merge_sc(self, other):
+        self._xmp_changed()
         # open other image and read its metadata
         image = exiv2.ImageFactory.open(other._path)
         image.readMetadata()
@@ -16,12 +16,23 @@
 ##  along with this program.  If not, see
 ##  <http://www.gnu.org/licenses/>.
 
-from datetime import timedelta
+from array import array
+import bisect
+import calendar
+import csv
+import heapq
+from datetime import datetime, timedelta, timezone
 import logging
+import math
 import os
+import re
+import xml.etree.ElementTree as ET
+import zipfile
 
-import gpxpy
-# See https://pypi.org/project/gpxpy/
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from photini.pyqt import QtCore, QtWidgets
 
@@ -29,6 +40,413 @@ from photini.pyqt import QtCore, QtWidgets
 logger = logging.getLogger(__name__)
 translate = QtCore.QCoreApplication.translate
 
+_time_re = re.compile(r'\s*(\d{4})[-/](\d{2})[-/](\d{2})[T ]'
+                      r'(\d{2}):(\d{2}):(\d{2})(\.\d+)?'
+                      r'\s*(Z|([+-])(\d{2}):?(\d{2}))?\s*$')
+
+
+def parse_time(text):
+    """Convert an ISO 8601 date & time string to a UTC timestamp.
+    Times without a time zone are assumed to be UTC.
+
+    """
+    match = _time_re.match(text or '')
+    if not match:
+        return None
+    groups = match.groups()
+    result = calendar.timegm(tuple(int(x) for x in groups[:6]))
+    if groups[6]:
+        result += float(groups[6])
+    if groups[8]:
+        offset = (int(groups[9]) * 3600) + (int(groups[10]) * 60)
+        if groups[8] == '+':
+            result -= offset
+        else:
+            result += offset
+    return result
+
+
+def _distance(lat0, lng0, lat1, lng1):
+    # approximate distance in metres, good enough for nearby points
+    d_lat = math.radians(lat1 - lat0)
+    d_lng = math.radians(((lng1 - lng0 + 180.0) % 360.0) - 180.0)
+    d_lng *= math.cos(math.radians((lat0 + lat1) / 2.0))
+    return 6371000.0 * math.hypot(d_lat, d_lng)
+
+
+def _distance_numpy(lat0, lng0, lat1, lng1):
+    d_lat = numpy.radians(lat1 - lat0)
+    d_lng = numpy.radians(((lng1 - lng0 + 180.0) % 360.0) - 180.0)
+    d_lng *= numpy.cos(numpy.radians((lat0 + lat1) / 2.0))
+    return 6371000.0 * numpy.hypot(d_lat, d_lng)
+
+
+def _reduce_points(points, min_distance):
+    result = []
+    for point in points:
+        if result and _distance(result[-1][1], result[-1][2],
+                                point[1], point[2]) < min_distance:
+            continue
+        result.append(point)
+    return result
+
+
+class TrackBuilder(object):
+    """Collect track points in compact arrays of timestamp, latitude,
+    longitude and elevation (NaN if unknown), and select a subset of up
+    to ``max_points`` points at least ``min_distance`` metres apart for
+    display.
+
+    """
+    def __init__(self, max_points=500, min_distance=25.0):
+        self.max_points = max_points
+        self.min_distance = min_distance
+        self.count = 0
+        self.arrays = array('d'), array('d'), array('d'), array('d')
+        self.reduced = []
+
+    def add(self, time_stamp, lat, lng, ele=None):
+        self.count += 1
+        if time_stamp is None:
+            return
+        times, lats, lngs, eles = self.arrays
+        times.append(time_stamp)
+        lats.append(lat)
+        lngs.append(lng)
+        eles.append(math.nan if ele is None else ele)
+        # reduce display points as we go
+        if self.reduced and _distance(self.reduced[-1][1], self.reduced[-1][2],
+                                      lat, lng) < self.min_distance:
+            return
+        self.reduced.append((time_stamp, lat, lng))
+        if len(self.reduced) > self.max_points * 2:
+            self.min_distance *= 2.0
+            self.reduced = _reduce_points(self.reduced, self.min_distance)
+
+    def result(self):
+        """Return the point count (including points without a time
+        stamp), the arrays, and a list of (timestamp, lat, lng) display
+        points.
+
+        """
+        while len(self.reduced) > self.max_points:
+            self.min_distance *= 1.5
+            self.reduced = _reduce_points(self.reduced, self.min_distance)
+        return self.count, self.arrays, self.reduced
+
+
+track_readers = []
+
+
+def register_reader(reader):
+    """Add a track file reader class. Can be used as a class decorator."""
+    track_readers.append(reader)
+    return reader
+
+
+def get_reader(path):
+    """Return a reader class for the file at ``path``, or None if the
+    file's extension is claimed by readers that can't read it.
+
+    """
+    ext = os.path.splitext(path)[1].lower()
+    claimed = False
+    for reader in track_readers:
+        if ext in reader.extensions:
+            claimed = True
+            if reader.accepts(path):
+                return reader
+    if claimed:
+        return None
+    # default to GPX
+    return GPXReader
+
+
+class TrackReader(object):
+    """Base class for track file readers.
+
+    Subclasses set ``extensions`` to a tuple of lower case file name
+    extensions, provide a translated ``description`` for the file
+    dialog, and read a file by passing each point to ``builder.add``.
+    Readers of generic extensions such as ``.txt`` also check the file
+    content in ``accepts``.
+
+    """
+    extensions = ()
+
+    @classmethod
+    def description(cls):
+        raise NotImplementedError
+
+    @classmethod
+    def accepts(cls, path):
+        return True
+
+    @classmethod
+    def read(cls, path, builder):
+        raise NotImplementedError
+
+    @staticmethod
+    def local_name(elem):
+        return elem.tag.rpartition('}')[2]
+
+
+@register_reader
+class GPXReader(TrackReader):
+    extensions = ('.gpx',)
+
+    @classmethod
+    def description(cls):
+        return translate('GpxImporter', 'GPX files')
+
+    @classmethod
+    def read(cls, path, builder):
+        # parse incrementally, discarding elements when they're used
+        stack = []
+        for event, elem in ET.iterparse(path, events=('start', 'end')):
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            if cls.local_name(elem) != 'trkpt':
+                continue
+            time_stamp = None
+            ele = None
+            for child in elem:
+                tag = cls.local_name(child)
+                if tag == 'time':
+                    time_stamp = parse_time(child.text)
+                elif tag == 'ele' and child.text:
+                    ele = float(child.text)
+            builder.add(time_stamp, float(elem.get('lat')),
+                        float(elem.get('lon')), ele)
+            # discard point and any previous points from the tree
+            if stack:
+                del stack[-1][:]
+
+
+@register_reader
+class KMLReader(TrackReader):
+    extensions = ('.kml', '.kmz')
+
+    @classmethod
+    def description(cls):
+        return translate('GpxImporter', 'KML files')
+
+    @classmethod
+    def read(cls, path, builder):
+        if os.path.splitext(path)[1].lower() != '.kmz':
+            return cls._read(path, builder)
+        with zipfile.ZipFile(path) as kmz:
+            names = [x for x in kmz.namelist() if x.lower().endswith('.kml')]
+            # main document is usually doc.kml
+            names.sort(key=lambda x: x.lower() != 'doc.kml')
+            for name in names[:1]:
+                with kmz.open(name) as kml:
+                    cls._read(kml, builder)
+
+    @staticmethod
+    def _coords(text):
+        lng, lat, *ele = (float(x) for x in text.replace(',', ' ').split())
+        return lat, lng, (ele[0] if ele else None)
+
+    @classmethod
+    def _read(cls, source, builder):
+        # use gx:Track elements, and Placemarks with a time stamp and a
+        # point, as other geometry has no time information
+        stack = []
+        when = []
+        coord = []
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            tag = cls.local_name(elem)
+            parent = stack and cls.local_name(stack[-1])
+            if tag == 'when' and parent == 'Track':
+                when.append(parse_time(elem.text))
+                del stack[-1][:]
+            elif tag == 'coord':
+                coord.append(elem.text)
+                if stack:
+                    del stack[-1][:]
+            elif tag == 'Track':
+                for time_stamp, text in zip(when, coord):
+                    builder.add(time_stamp, *cls._coords(text))
+                when = []
+                coord = []
+            elif tag == 'Placemark':
+                time_stamp = elem.find('.//{*}TimeStamp/{*}when')
+                point = elem.find('.//{*}Point/{*}coordinates')
+                if time_stamp is not None and point is not None:
+                    builder.add(parse_time(time_stamp.text),
+                                *cls._coords(point.text))
+                if stack:
+                    del stack[-1][:]
+
+
+@register_reader
+class NMEAReader(TrackReader):
+    extensions = ('.nmea', '.nma', '.log')
+
+    @classmethod
+    def description(cls):
+        return translate('GpxImporter', 'NMEA files')
+
+    _sentence_re = re.compile(r'\$G[A-Z](GGA|RMC),')
+
+    @classmethod
+    def accepts(cls, path):
+        # look for a position sentence near the start of the file
+        try:
+            with open(path, 'r', encoding='ascii', errors='replace') as f:
+                return bool(cls._sentence_re.search(f.read(4096)))
+        except OSError:
+            return False
+
+    @staticmethod
+    def _angle(value, hemisphere):
+        degrees, minutes = divmod(float(value), 100.0)
+        result = degrees + (minutes / 60.0)
+        if hemisphere in ('S', 'W'):
+            result = -result
+        return result
+
+    @classmethod
+    def read(cls, path, builder):
+        # position & date come from RMC sentences, altitude from GGA
+        # sentences with the same time of day
+        pending = None
+        altitude = None, None
+        with open(path, 'r', encoding='ascii', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                start = line.find('$')
+                if start < 0:
+                    continue
+                line = line[start + 1:]
+                line, sep, checksum = line.partition('*')
+                if sep:
+                    total = 0
+                    for c in line.encode('ascii', errors='replace'):
+                        total ^= c
+                    try:
+                        if total != int(checksum[:2], 16):
+                            continue
+                    except ValueError:
+                        continue
+                fields = line.split(',')
+                kind = fields[0][-3:]
+                try:
+                    if kind == 'GGA' and len(fields) > 9 and fields[9]:
+                        altitude = fields[1], float(fields[9])
+                        if pending and pending[4] == fields[1]:
+                            pending[3] = altitude[1]
+                    elif (kind == 'RMC' and len(fields) > 9
+                              and fields[2] == 'A'):
+                        if pending:
+                            builder.add(*pending[:4])
+                        hms, date = fields[1], fields[9]
+                        year = int(date[4:6])
+                        year += (2000, 1900)[year >= 80]
+                        time_stamp = calendar.timegm((
+                            year, int(date[2:4]), int(date[0:2]),
+                            int(hms[0:2]), int(hms[2:4]), 0)) + float(hms[4:])
+                        pending = [
+                            time_stamp, cls._angle(fields[3], fields[4]),
+                            cls._angle(fields[5], fields[6]), None, hms]
+                        if altitude[0] == hms:
+                            pending[3] = altitude[1]
+                except (ValueError, IndexError):
+                    continue
+        if pending:
+            builder.add(*pending[:4])
+
+
+@register_reader
+class CSVReader(TrackReader):
+    extensions = ('.csv', '.txt')
+    columns = {
+        'time': ('time', 'datetime', 'date_time', 'timestamp', 'utc',
+                 'gps_time', 'date time'),
+        'date': ('date',),
+        'lat' : ('lat', 'latitude'),
+        'lng' : ('lon', 'lng', 'long', 'longitude'),
+        'ele' : ('ele', 'alt', 'altitude', 'elevation', 'height'),
+        }
+
+    @classmethod
+    def description(cls):
+        return translate('GpxImporter', 'CSV files')
+
+    @classmethod
+    def _open(cls, f):
+        # return a CSV reader and the column index of each known item
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        header = [x.strip().lower() for x in next(reader, [])]
+        idx = {}
+        for key, names in cls.columns.items():
+            for name in names:
+                if name in header:
+                    idx[key] = header.index(name)
+                    break
+        return reader, idx
+
+    @classmethod
+    def accepts(cls, path):
+        # header row must have latitude and longitude columns
+        try:
+            with open(path, newline='', encoding='utf-8',
+                      errors='replace') as f:
+                reader, idx = cls._open(f)
+        except (OSError, csv.Error):
+            return False
+        return 'lat' in idx and 'lng' in idx
+
+    @classmethod
+    def read(cls, path, builder):
+        with open(path, newline='', encoding='utf-8',
+                  errors='replace') as f:
+            reader, idx = cls._open(f)
+            if 'lat' not in idx or 'lng' not in idx:
+                logger.error('No latitude & longitude columns in "%s"',
+                             os.path.basename(path))
+                return
+            for row in reader:
+                try:
+                    lat = float(row[idx['lat']])
+                    lng = float(row[idx['lng']])
+                except (ValueError, IndexError):
+                    continue
+                ele = None
+                if 'ele' in idx:
+                    try:
+                        ele = float(row[idx['ele']])
+                    except (ValueError, IndexError):
+                        pass
+                builder.add(cls._time(row, idx), lat, lng, ele)
+
+    @staticmethod
+    def _time(row, idx):
+        try:
+            text = row[idx['time']].strip() if 'time' in idx else ''
+            if 'date' in idx:
+                text = row[idx['date']].strip() + ' ' + text
+        except IndexError:
+            return None
+        try:
+            # seconds since the epoch
+            return float(text)
+        except ValueError:
+            return parse_time(text)
+
 
 class GpxImporter(QtCore.QObject):
     def __init__(self, *args, **kwds):
@@ -37,17 +455,62 @@ class GpxImporter(QtCore.QObject):
         self.clear_data()
 
     def clear_data(self):
+        # points to display, sorted by time, with at most one per time stamp
         self.display_points = []
-        self.gpx = {}
+        self.display_times = set()
+        # all track points, sorted by time, as compact arrays of UTC
+        # timestamp, latitude, longitude and elevation (NaN if unknown)
+        self.times = array('d')
+        self.lats = array('d')
+        self.lngs = array('d')
+        self.eles = array('d')
+
+    def add_points(self, times, lats, lngs, eles):
+        if not times:
+            return
+        need_sort = self.times and times[0] < self.times[-1]
+        if not need_sort:
+            for i in range(len(times) - 1):
+                if times[i] > times[i + 1]:
+                    need_sort = True
+                    break
+        self.times.extend(times)
+        self.lats.extend(lats)
+        self.lngs.extend(lngs)
+        self.eles.extend(eles)
+        if not need_sort:
+            return
+        if numpy:
+            order = numpy.argsort(
+                numpy.frombuffer(self.times, dtype=float), kind='stable')
+            for name in ('times', 'lats', 'lngs', 'eles'):
+                setattr(self, name, array('d', numpy.frombuffer(
+                    getattr(self, name), dtype=float)[order].tobytes()))
+        else:
+            order = sorted(range(len(self.times)), key=self.times.__getitem__)
+            for name in ('times', 'lats', 'lngs', 'eles'):
+                values = getattr(self, name)
+                setattr(self, name, array('d', (values[i] for i in order)))
 
     def import_file(self):
         # get file path
+        filters = []
+        all_exts = []
+        for reader in track_readers:
+            exts = []
+            for ext in reader.extensions:
+                exts += ['*' + ext, '*' + ext.upper()]
+            filters.append(
+                '{} ({})'.format(reader.description(), ' '.join(exts)))
+            all_exts += exts
+        filters.insert(0, '{} ({})'.format(
+            translate('GpxImporter', 'Track files'), ' '.join(all_exts)))
+        filters.append(translate('GpxImporter', 'All files (*)'))
         args = [
             self.parent(),
-            translate('GpxImporter', 'Import GPX file'),
+            translate('GpxImporter', 'Import GPS track file'),
             self.config_store.get('paths', 'gpx', ''),
-            translate('GpxImporter',
-                      "GPX files (*.gpx *.GPX *.Gpx);;All files (*)")
+            ';;'.join(filters)
             ]
         if not self.config_store.get('pyqt', 'native_dialog', True):
             args += [None, QtWidgets.QFileDialog.Option.DontUseNativeDialog]
@@ -57,40 +520,219 @@ class GpxImporter(QtCore.QObject):
             return []
         path = os.path.abspath(path)
         self.config_store.set('paths', 'gpx', os.path.dirname(path))
-        # open and read GPX file
-        with open(path) as gpx_file:
-            gpx = gpxpy.parse(gpx_file)
-        if not gpx.get_points_no():
+        # read file, keeping a subset of points to display
+        builder = TrackBuilder()
+        reader = get_reader(path)
+        if not reader:
+            logger.error('Unrecognised track file "%s"',
+                         os.path.basename(path))
+            return []
+        reader.read(path, builder)
+        count, arrays, reduced = builder.result()
+        if not count:
             logger.error('No points in file "%s"', os.path.basename(path))
             return []
-        if not gpx.has_times():
+        if not arrays[0]:
             logger.error('No time stamps in file "%s"', os.path.basename(path))
             return []
-        self.gpx[path] = gpx
-        # make a list of points to display, which may be a subset of a
-        # large file
-        reduced_gpx = self.gpx[path].clone()
-        reduced_gpx.reduce_points(max_points_no=500, min_distance=25.0)
+        self.add_points(*arrays)
         result = []
-        for p in reduced_gpx.walk(only_points=True):
-            time_stamp = p.time
-            if time_stamp.tzinfo is not None:
-                # convert timestamp to UTC
-                utc_offset = time_stamp.utcoffset()
-                time_stamp = (time_stamp - utc_offset).replace(tzinfo=None)
-            # add point to list
-            point = time_stamp, p.latitude, p.longitude
-            if point not in self.display_points:
-                self.display_points.append(point)
+        new_points = []
+        for time_stamp, lat, lng in reduced:
+            time_stamp = datetime.fromtimestamp(
+                time_stamp, timezone.utc).replace(tzinfo=None)
+            point = time_stamp, lat, lng
+            if time_stamp not in self.display_times:
+                self.display_times.add(time_stamp)
+                new_points.append(point)
             result.append(point)
-        self.display_points.sort(key=lambda x: x[0])
+        new_points.sort(key=lambda x: x[0])
+        self.display_points = list(heapq.merge(
+            self.display_points, new_points, key=lambda x: x[0]))
+        return result
+
+    def get_locations_at(self, utc_times):
+        """Return interpolated (lat, lng, ele) of the track at each of a
+        list of UTC timestamps, or None where the track has no point
+        within the maximum time gap (in seconds) set by the ``map``,
+        ``gpx_max_gap`` config option.
+
+        """
+        max_gap = self.config_store.get('map', 'gpx_max_gap', 600)
+        if not (utc_times and self.times):
+            return [None] * len(utc_times)
+        if numpy:
+            return self._locations_numpy(utc_times, max_gap)
+        result = []
+        for utc_time in utc_times:
+            hi = bisect.bisect_right(self.times, utc_time)
+            lo = hi - 1
+            if lo >= 0 and self.times[lo] == utc_time:
+                hi = lo
+            if lo < 0 or hi >= len(self.times):
+                result.append(None)
+                continue
+            gap = self.times[hi] - self.times[lo]
+            if gap > max_gap:
+                result.append(None)
+                continue
+            frac = (utc_time - self.times[lo]) / gap if gap else 0.0
+            result.append(self._interpolate(
+                frac, (self.lats[lo], self.lngs[lo], self.eles[lo]),
+                (self.lats[hi], self.lngs[hi], self.eles[hi])))
+        return result
+
+    @staticmethod
+    def _interpolate(frac, p0, p1):
+        lat0, lng0, ele0 = p0
+        lat1, lng1, ele1 = p1
+        # take the short way round if track crosses 180 degrees
+        d_lng = ((lng1 - lng0 + 180.0) % 360.0) - 180.0
+        lng = ((lng0 + (frac * d_lng) + 180.0) % 360.0) - 180.0
+        ele = ele0 + (frac * (ele1 - ele0))
+        return (lat0 + (frac * (lat1 - lat0)), lng,
+                None if math.isnan(ele) else ele)
+
+    def _locations_numpy(self, utc_times, max_gap):
+        valid, lat, lng, ele = self._interp_numpy(utc_times, max_gap)
+        result = []
+        for i in range(len(utc_times)):
+            if not valid[i]:
+                result.append(None)
+            elif math.isnan(ele[i]):
+                result.append((float(lat[i]), float(lng[i]), None))
+            else:
+                result.append((float(lat[i]), float(lng[i]), float(ele[i])))
+        return result
+
+    def _interp_numpy(self, utc_times, max_gap):
+        times = numpy.frombuffer(self.times, dtype=float)
+        lats = numpy.frombuffer(self.lats, dtype=float)
+        lngs = numpy.frombuffer(self.lngs, dtype=float)
+        eles = numpy.frombuffer(self.eles, dtype=float)
+        utc_times = numpy.asarray(utc_times, dtype=float)
+        hi = numpy.searchsorted(times, utc_times, side='right')
+        lo = hi - 1
+        exact = (lo >= 0) & (times[numpy.clip(lo, 0, None)] == utc_times)
+        hi = numpy.where(exact, lo, hi)
+        valid = (lo >= 0) & (hi < len(times))
+        lo = numpy.clip(lo, 0, len(times) - 1)
+        hi = numpy.clip(hi, 0, len(times) - 1)
+        gap = times[hi] - times[lo]
+        valid &= gap <= max_gap
+        frac = numpy.divide(utc_times - times[lo], gap,
+                            out=numpy.zeros_like(gap), where=gap > 0)
+        lat = lats[lo] + (frac * (lats[hi] - lats[lo]))
+        d_lng = ((lngs[hi] - lngs[lo] + 180.0) % 360.0) - 180.0
+        lng = ((lngs[lo] + (frac * d_lng) + 180.0) % 360.0) - 180.0
+        ele = eles[lo] + (frac * (eles[hi] - eles[lo]))
+        return valid, lat, lng, ele
+
+    def fit_offset(self, utc_times, known=None):
+        """Find the camera clock error that best aligns photographs
+        taken at ``utc_times`` with the track.
+
+        If any photographs already have coordinates (``known`` is an
+        optional list of (lat, lng) or None) the chosen offset minimises
+        their mean distance from the track. Otherwise the offset puts
+        the most photographs on the track at the lowest mean speed, as
+        photographs are usually taken when not moving.
+
+        The search range (in seconds) is set by the ``map``,
+        ``gpx_max_offset`` config option. Returns an offset in seconds,
+        to be added to the photographs' times, or None if no offset puts
+        any photograph on the track.
+
+        """
+        if not (utc_times and self.times):
+            return None
+        known = known or [None] * len(utc_times)
+        max_offset = int(self.config_store.get('map', 'gpx_max_offset', 7200))
+        best = 0
+        # coarse search, then fine search around best coarse offset
+        for step, span in ((60, max_offset), (1, 60)):
+            offsets = [best + (i * step)
+                       for i in range(-(span // step), (span // step) + 1)]
+            if numpy:
+                scores = self._score_offsets_numpy(utc_times, known, offsets)
+            else:
+                scores = self._score_offsets(utc_times, known, offsets)
+            candidates = [(score, abs(offset), offset)
+                          for (score, offset) in zip(scores, offsets)
+                          if score is not None]
+            if not candidates:
+                return None
+            best = min(candidates)[2]
+        return best
+
+    def _score_offsets(self, utc_times, known, offsets):
+        # lower score is better, None if no photographs are on the track
+        result = []
+        for offset in offsets:
+            times = [x + offset for x in utc_times]
+            here = self.get_locations_at(times)
+            count = 0
+            total = 0.0
+            if any(known):
+                for p, q in zip(here, known):
+                    if p and q:
+                        count += 1
+                        total += _distance(p[0], p[1], q[0], q[1])
+                result.append((total / count,) if count else None)
+                continue
+            before = self.get_locations_at([x - 5.0 for x in times])
+            after = self.get_locations_at([x + 5.0 for x in times])
+            for p, q in zip(before, after):
+                if p and q:
+                    count += 1
+                    total += _distance(p[0], p[1], q[0], q[1]) / 10.0
+            matched = len(list(filter(None, here)))
+            if not matched:
+                result.append(None)
+            else:
+                result.append((-matched, total / count if count else math.inf))
         return result
 
-    def get_locations_at(self, utc_time):
-        # return track point(s) nearest given time stamp
+    def _score_offsets_numpy(self, utc_times, known, offsets):
+        max_gap = self.config_store.get('map', 'gpx_max_gap', 600)
+        utc_times = numpy.asarray(utc_times, dtype=float)
+        known_mask = numpy.array([bool(x) for x in known])
+        known_lat = numpy.array([x[0] if x else 0.0 for x in known])
+        known_lng = numpy.array([x[1] if x else 0.0 for x in known])
+        offsets = numpy.asarray(offsets, dtype=float)
+        # process a limited number of times in each pass
+        chunk = max(1, 250000 // len(utc_times))
         result = []
-        for gpx in self.gpx.values():
-            result += gpx.get_location_at(utc_time)
+        for start in range(0, len(offsets), chunk):
+            times = offsets[start:start+chunk, None] + utc_times[None, :]
+            shape = times.shape
+            times = times.ravel()
+            valid, lat, lng, ele = self._interp_numpy(times, max_gap)
+            valid = valid.reshape(shape)
+            if known_mask.any():
+                mask = valid & known_mask[None, :]
+                error = _distance_numpy(
+                    lat.reshape(shape), lng.reshape(shape),
+                    known_lat[None, :], known_lng[None, :])
+                count = mask.sum(axis=1)
+                error = numpy.where(mask, error, 0.0).sum(axis=1)
+                result += [(float(e / c),) if c else None
+                           for (e, c) in zip(error, count)]
+                continue
+            valid_0, lat_0, lng_0, ele = self._interp_numpy(
+                times - 5.0, max_gap)
+            valid_1, lat_1, lng_1, ele = self._interp_numpy(
+                times + 5.0, max_gap)
+            mask = (valid_0 & valid_1).reshape(shape)
+            speed = _distance_numpy(lat_0, lng_0, lat_1, lng_1) / 10.0
+            speed = numpy.where(mask, speed.reshape(shape), 0.0).sum(axis=1)
+            count = mask.sum(axis=1)
+            matched = valid.sum(axis=1)
+            for m, s, c in zip(matched, speed, count):
+                if not m:
+                    result.append(None)
+                else:
+                    result.append((-int(m), float(s / c) if c else math.inf))
         return result
 
     def nearest(self, utc_time):
@@ -16,10 +16,15 @@
 ##  along with this program.  If not, see
 ##  <http://www.gnu.org/licenses/>.
 
+import bisect
+from concurrent.futures import as_completed, ThreadPoolExecutor
 from datetime import datetime
 import io
 import logging
 import os
+import time
+
+import cachetools
 
 try:
     import PIL.Image as PIL
@@ -27,58 +32,180 @@ except ImportError:
     PIL = None
 
 from photini.ffmpeg import FFmpeg
-from photini.metadata import Metadata
+from photini.metadata import ImageMetadata, Metadata
+from photini.metadataindex import MetadataIndex
 from photini.pyqt import *
 from photini.pyqt import (image_types, image_types_lower, qt_version_info,
                           set_symbol_font, video_types, video_types_lower)
+from photini.thumbcache import ThumbnailCache
+from photini.types import MD_Thumbnail
 
 logger = logging.getLogger(__name__)
 translate = QtCore.QCoreApplication.translate
 DRAG_MIMETYPE = 'application/x-photini-image'
 
 
-class Image(QtWidgets.QFrame):
-    def __init__(self, path, thumb_size=4, *arg, **kw):
-        super(Image, self).__init__(*arg, **kw)
+class MetadataLoader(QtCore.QObject):
+    """Read metadata from many files concurrently, in a pool of worker
+    threads, and pass the results back to the GUI thread in batches.
+
+    """
+    finished = QtSignal()
+    new_metadata = QtSignal(list)
+
+    def __init__(self, path_list, index=None, thumb_cache=None,
+                 max_workers=None, *args, **kwds):
+        super(MetadataLoader, self).__init__(*args, **kwds)
+        self.path_list = path_list
+        self.index = index
+        self.thumb_cache = thumb_cache
+        self.max_workers = max_workers
+        self.running = True
+
+    def load(self, path):
+        try:
+            metadata = Metadata(path, index=self.index)
+        except Exception as ex:
+            logger.exception(ex)
+            return path, None
+        if (self.thumb_cache and not metadata.thumbnail and self.running
+                and self.thumb_cache.get(path) is None):
+            # generate thumbnail to display, but don't add it to metadata
+            data = None
+            try:
+                thumb = Image.make_thumbnail(path, metadata)
+                if thumb:
+                    data = thumb['data'] or MD_Thumbnail.data_from_image(
+                        thumb['image'])
+            except Exception as ex:
+                logger.exception(ex)
+            # store empty data if it failed, to avoid trying again
+            self.thumb_cache.put(path, data or b'')
+        return path, metadata
+
+    @QtSlot()
+    @catch_all
+    def start(self):
+        batch = []
+        last_emit = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.load, x) for x in self.path_list]
+            for future in as_completed(futures):
+                if not self.running:
+                    break
+                batch.append(future.result())
+                # send results at a rate the GUI can keep up with
+                now = time.monotonic()
+                if len(batch) >= 100 or now - last_emit > 0.25:
+                    self.new_metadata.emit(batch)
+                    batch = []
+                    last_emit = now
+            for future in futures:
+                future.cancel()
+        if batch and self.running:
+            self.new_metadata.emit(batch)
+        self.finished.emit()
+
+
+class MetadataSaver(QtCore.QObject):
+    """Write metadata to many files concurrently, in a pool of worker
+    threads. Metadata values are got in the GUI thread before starting.
+
+    """
+    finished = QtSignal()
+    saved = QtSignal(str, bool)
+
+    def __init__(self, jobs, max_workers=None, *args, **kwds):
+        super(MetadataSaver, self).__init__(*args, **kwds)
+        self.jobs = jobs
+        self.max_workers = max_workers
+        self.running = True
+
+    @staticmethod
+    def save(metadata, values, kw):
+        try:
+            return metadata.write_files(values, **kw)
+        except Exception as ex:
+            logger.exception(ex)
+            return False
+
+    @QtSlot()
+    @catch_all
+    def start(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for path, metadata, values, kw in self.jobs:
+                futures[executor.submit(self.save, metadata, values, kw)] = path
+            for future in as_completed(futures):
+                if not self.running:
+                    # files already being written will still be reported
+                    for f in futures:
+                        f.cancel()
+                if not future.cancelled():
+                    self.saved.emit(futures[future], future.result())
+        self.finished.emit()
+
+
+class SaveVerifier(QtCore.QObject):
+    """Check that files saved without verification really were saved,
+    by re-reading them in a separate thread.
+
+    """
+    finished = QtSignal()
+    failed = QtSignal(str)
+
+    def __init__(self, unverified, *args, **kwds):
+        super(SaveVerifier, self).__init__(*args, **kwds)
+        self.unverified = unverified
+        self.running = True
+
+    @QtSlot()
+    @catch_all
+    def start(self):
+        for image_path, path, tags in self.unverified:
+            if not self.running:
+                break
+            if not ImageMetadata.check_saved(path, tags, quick=True):
+                self.failed.emit(image_path)
+        self.finished.emit()
+
+
+def hash_key(value):
+    """Return a hashable equivalent of a metadata value, such that two
+    values are equal if their hash keys are equal. Raise TypeError if
+    the value's type has its own equality test but no hash.
+
+    """
+    eq = type(value).__eq__
+    if eq == dict.__eq__:
+        return frozenset((k, hash_key(v)) for (k, v) in value.items())
+    if eq == tuple.__eq__:
+        return tuple(hash_key(x) for x in value)
+    hash(value)
+    return value
+
+
+class Image(object):
+    def __init__(self, path, metadata=None):
+        super(Image, self).__init__()
         self.app = QtWidgets.QApplication.instance()
         self.path = path
         self.name, ext = os.path.splitext(os.path.basename(self.path))
         self.selected = False
-        # read metadata
-        self.metadata = Metadata(self.path, notify=self.show_status)
+        self._preview = None
+        self._date_key = None
+        # read metadata, unless already done by a MetadataLoader
+        if metadata:
+            self.metadata = metadata
+            # editing needs every item, read any that are still unread
+            self.metadata.materialise()
+            self.metadata.set_notify(self.show_status)
+        else:
+            self.metadata = Metadata(self.path, notify=self.show_status)
         self.file_times = (os.path.getatime(self.path),
                            os.path.getmtime(self.path))
         # set file type
         self.file_type = self.metadata.mime_type
-        # sub widgets
-        layout = QtWidgets.QGridLayout()
-        layout.setSpacing(0)
-        layout.setContentsMargins(3, 3, 3, 3)
-        self.setLayout(layout)
-        self.setToolTip('<p>' + self.path + '</p>')
-        # label to display image
-        self.image = QtWidgets.QLabel()
-        self.image.setWordWrap(True)
-        self.image.setAlignment(
-            Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter)
-        layout.addWidget(self.image, 0, 0, 1, 2)
-        # label to display file name
-        self.label = QtWidgets.QLabel()
-        self.label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        scale_font(self.label, 80)
-        layout.addWidget(self.label, 1, 1)
-        # label to display status
-        self.status = QtWidgets.QLabel()
-        self.status.setAlignment(Qt.AlignmentFlag.AlignLeft)
-        set_symbol_font(self.status)
-        scale_font(self.status, 80)
-        layout.addWidget(self.status, 1, 0)
-        self.setFrameStyle(
-            QtWidgets.QFrame.Shape.Panel | QtWidgets.QFrame.Shadow.Plain)
-        self.setObjectName("thumbnail")
-        self.set_selected(False)
-        self.show_status(False)
-        self._set_thumb_size(thumb_size)
 
     def reload_metadata(self):
         self.metadata = Metadata(self.path, notify=self.show_status)
@@ -93,36 +220,50 @@ class Image(QtWidgets.QFrame):
         return pixmap.transformed(transform)
 
     def regenerate_thumbnail(self):
+        # use previously generated thumbnail if there is one
+        thumb_cache = self.app.image_list.thumb_cache
+        data = thumb_cache and thumb_cache.get(self.path)
+        if data:
+            self.metadata.thumbnail = {'data': data}
+            return True
+        thumb = self.make_thumbnail(self.path, self.metadata)
+        if thumb:
+            self.metadata.thumbnail = thumb
+            return True
+        return False
+
+    @classmethod
+    def make_thumbnail(cls, path, metadata):
         # DCF spec says thumbnail must be 160 x 120, so other aspect
         # ratios are padded with black
         # try using PIL first, good quality and quick
-        qt_im = self.get_qt_image()
+        qt_im = None
+        if metadata.mime_type.split('/')[0] != 'video':
+            qt_im = cls.get_qt_image(path)
         if qt_im and PIL:
-            data = self.make_thumb_PIL(qt_im)
+            data = cls.make_thumb_PIL(qt_im)
             if data:
-                self.metadata.thumbnail = {'data': data}
-                return True
+                return {'data': data, 'image': None}
         # next try using FFmpeg, good quality but slower
-        data = self.make_thumb_ffmpeg()
+        data = cls.make_thumb_ffmpeg(path, metadata)
         if data:
-            self.metadata.thumbnail = {'data': data}
-            return True
+            return {'data': data, 'image': None}
         # lastly use Qt, quick but not high quality
         if qt_im:
-            qt_im = self.make_thumb_Qt(qt_im)
+            qt_im = cls.make_thumb_Qt(qt_im)
             if qt_im:
-                self.metadata.thumbnail = {'image': qt_im}
-                return True
-        return False
+                return {'data': None, 'image': qt_im}
+        return None
 
-    def make_thumb_ffmpeg(self):
+    @staticmethod
+    def make_thumb_ffmpeg(path, metadata):
         # get input dimensions
-        dims = self.metadata.dimensions
+        dims = metadata.dimensions
         if not dims:
             return None
         width = dims['width']
         height = dims['height']
-        duration = self.metadata.video_duration or 0
+        duration = metadata.video_duration or 0
         skip = int(min(duration / 2, 10.0))
         # target dimensions
         w, h = 160, 120
@@ -132,7 +273,7 @@ class Image(QtWidgets.QFrame):
         quality = 1
         while True:
             try:
-                data = FFmpeg.make_thumbnail(self.path, w, h, skip, quality)
+                data = FFmpeg.make_thumbnail(path, w, h, skip, quality)
             except Exception as ex:
                 logger.error(str(ex))
                 return None
@@ -141,12 +282,13 @@ class Image(QtWidgets.QFrame):
             quality += 1
         return data
 
-    def get_qt_image(self):
-        reader = QtGui.QImageReader(self.path)
+    @staticmethod
+    def get_qt_image(path):
+        reader = QtGui.QImageReader(path)
         reader.setAutoTransform(False)
         qt_im = reader.read()
         if not qt_im or qt_im.isNull():
-            logger.error('Image read: %s: %s', self.path, reader.errorString())
+            logger.error('Image read: %s: %s', path, reader.errorString())
             return None
         w = qt_im.width()
         h = qt_im.height()
@@ -173,7 +315,8 @@ class Image(QtWidgets.QFrame):
             qt_im = qt_im.copy(0, -pad, w, new_h)
         return qt_im
 
-    def make_thumb_PIL(self, qt_im):
+    @staticmethod
+    def make_thumb_PIL(qt_im):
         w, h = 160, 120
         if qt_im.width() < qt_im.height():
             w, h = h, w
@@ -194,7 +337,8 @@ class Image(QtWidgets.QFrame):
         pil_im.save(data, 'JPEG')
         return data.getvalue()
 
-    def make_thumb_Qt(self, qt_im):
+    @staticmethod
+    def make_thumb_Qt(qt_im):
         w, h = 160, 120
         if qt_im.width() < qt_im.height():
             w, h = h, w
@@ -202,52 +346,388 @@ class Image(QtWidgets.QFrame):
         return qt_im.scaled(w, h, Qt.AspectRatioMode.IgnoreAspectRatio,
                             Qt.TransformationMode.SmoothTransformation)
 
+    def sort_key(self, sort_date):
+        if not sort_date:
+            return self.path
+        dates = (self.metadata.date_taken, self.metadata.date_digitised,
+                 self.metadata.date_modified)
+        # setting or reloading a date always replaces the object, so
+        # comparing identities is enough to check the cached key
+        if self._date_key and all(
+                x is y for (x, y) in zip(dates, self._date_key[0])):
+            return self._date_key[1]
+        result = dates[0] or dates[1] or dates[2]
+        if result:
+            result = result['datetime']
+        else:
+            # use file date as last resort
+            result = datetime.fromtimestamp(self.file_times[1])
+        # convert result to string and append path so photos with same
+        # time stamp get sorted consistently
+        result = result.strftime('%Y%m%d%H%M%S%f') + self.path
+        self._date_key = dates, result
+        return result
+
+    def show_status(self, changed):
+        self.app.image_list.image_changed(self)
+        if changed:
+            self.app.image_list.new_metadata.emit(True)
+
+    def get_status(self):
+        status = ''
+        # set 'geotagged' status
+        if self.metadata.gps_info['exif:GPSLatitude']:
+            status += chr(0x2690)
+        # set 'unsaved' status
+        if self.metadata.changed():
+            status += chr(0x26A1)
+        return status
+
+    def get_preview(self):
+        # get thumbnail generated by MetadataLoader, if there is one
+        if self._preview is None:
+            self._preview = False
+            thumb_cache = self.app.image_list.thumb_cache
+            data = thumb_cache and thumb_cache.get(self.path)
+            if data:
+                try:
+                    self._preview = MD_Thumbnail.image_from_data(data)[1]
+                except Exception as ex:
+                    logger.error('%s: %s', self.path, str(ex))
+        return self._preview
+
+    def get_pixmap(self, width, height):
+        # get thumbnail, scaled to fit width & height
+        image = self.metadata.thumbnail and self.metadata.thumbnail['image']
+        if not image:
+            image = self.get_preview()
+        if not image:
+            return None
+        pixmap_cache = self.app.image_list.pixmap_cache
+        key = (image.cacheKey(), self.metadata.orientation, width, height)
+        pixmap = pixmap_cache.get(key)
+        if not pixmap:
+            pixmap = QtGui.QPixmap.fromImage(image)
+            pixmap = self.transform(pixmap, self.metadata.orientation)
+            pixmap = pixmap.scaled(
+                width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation)
+            try:
+                pixmap_cache[key] = pixmap
+            except ValueError:
+                # pixmap is larger than cache
+                pass
+        return pixmap
+
+    def load_thumbnail(self, label=None):
+        if not label:
+            # thumbnail grid will redraw image
+            self.app.image_list.image_changed(self)
+            return
+        rect = label.contentsRect()
+        pixmap = self.get_pixmap(rect.width(), rect.height())
+        if not pixmap:
+            label.setText(wrap_text(
+                label, translate('ImageList', 'No thumbnail in file'), lines=4))
+            return
+        label.setPixmap(pixmap)
+
+    def set_selected(self, value):
+        self.selected = value
+        self.app.image_list.selection_updated(self)
+
+    def get_selected(self):
+        return self.selected
+
+
+class ThumbnailModel(QtCore.QAbstractListModel):
+    def __init__(self, images, *args, **kwds):
+        super(ThumbnailModel, self).__init__(*args, **kwds)
+        # list of Image objects, owned by ImageList
+        self.images = images
+        # image to row mapping, rebuilt when needed
+        self.rows = None
+
+    def row(self, image):
+        if self.rows is None:
+            self.rows = dict((x, n) for (n, x) in enumerate(self.images))
+        return self.rows[image]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.images)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        image = self.images[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return image.name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return '<p>' + image.path + '</p>'
+        return None
+
+    def append_images(self, images):
+        # add any number of images with a single layout pass
+        if not images:
+            return
+        row = len(self.images)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(images) - 1)
+        self.images.extend(images)
+        if self.rows is not None:
+            for n, image in enumerate(images, row):
+                self.rows[image] = n
+        self.endInsertRows()
+
+    def insert_images(self, images, key):
+        # insert images into an already sorted list
+        images = sorted(images, key=key)
+        # don't use old keys, dates may have been edited since sorting
+        keys = [key(x) for x in self.images]
+        if any(keys[n] > keys[n + 1] for n in range(len(keys) - 1)):
+            # list is no longer in order, so bisect can't be used
+            self.append_images(images)
+            self.sort_images(key)
+            return
+        if not keys or key(images[0]) >= keys[-1]:
+            self.append_images(images)
+            return
+        # group images by insertion point, so each group of adjacent
+        # rows is inserted in one operation
+        groups = []
+        for image in images:
+            row = bisect.bisect_right(keys, key(image))
+            if groups and groups[-1][0] == row:
+                groups[-1][1].append(image)
+            else:
+                groups.append((row, [image]))
+        # insert last group first so earlier row numbers stay valid
+        for row, group in reversed(groups):
+            self.beginInsertRows(
+                QtCore.QModelIndex(), row, row + len(group) - 1)
+            self.images[row:row] = group
+            self.rows = None
+            self.endInsertRows()
+
+    def remove_images(self, images):
+        images = set(images)
+        self.beginResetModel()
+        self.images[:] = [x for x in self.images if x not in images]
+        self.rows = None
+        self.endResetModel()
+
+    def sort_images(self, key):
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_images = [self.images[x.row()] for x in old_indexes]
+        self.images.sort(key=key)
+        self.rows = None
+        self.changePersistentIndexList(old_indexes, [
+            self.index(self.row(image), idx.column())
+            for (image, idx) in zip(old_images, old_indexes)])
+        self.layoutChanged.emit()
+
+
+class ThumbnailDelegate(QtWidgets.QStyledItemDelegate):
+    margin = 5
+
+    def __init__(self, images, *args, **kwds):
+        super(ThumbnailDelegate, self).__init__(*args, **kwds)
+        self.images = images
+        # use labels to get fonts the same way as other widgets
+        self.name_label = QtWidgets.QLabel()
+        scale_font(self.name_label, 80)
+        self.status_label = QtWidgets.QLabel()
+        set_symbol_font(self.status_label)
+        scale_font(self.status_label, 80)
+        self.set_thumb_size(4)
+
+    def set_thumb_size(self, thumb_size):
+        self.thumb_w = width_for_text(
+            self.name_label, 'X' * thumb_size * 20) // 6
+        self.cell_size = QtCore.QSize(
+            self.thumb_w + (self.margin * 2),
+            self.thumb_w + self.name_label.fontMetrics().height()
+            + (self.margin * 2))
+
+    def sizeHint(self, option, index):
+        return self.cell_size
+
+    @catch_all
+    def paint(self, painter, option, index):
+        image = self.images[index.row()]
+        rect = option.rect
+        painter.save()
+        # frame, as used to be drawn by style sheet
+        pen = QtGui.QPen(QtGui.QColor(('grey', 'red')[image.selected]))
+        pen.setWidth(2)
+        painter.setPen(pen)
+        painter.drawRect(rect.adjusted(1, 1, -1, -1))
+        # thumbnail
+        painter.setPen(option.palette.color(QtGui.QPalette.ColorRole.Text))
+        x = rect.left() + self.margin
+        y = rect.top() + self.margin
+        thumb_rect = QtCore.QRect(x, y, self.thumb_w, self.thumb_w)
+        pixmap = image.get_pixmap(self.thumb_w, self.thumb_w)
+        if pixmap:
+            painter.drawPixmap(
+                x + (self.thumb_w - pixmap.width()) // 2,
+                y + (self.thumb_w - pixmap.height()) // 2, pixmap)
+        else:
+            painter.setFont(self.name_label.font())
+            painter.drawText(
+                thumb_rect, flag_to_int(Qt.AlignmentFlag.AlignCenter)
+                | flag_to_int(Qt.TextFlag.TextWordWrap),
+                translate('ImageList', 'No thumbnail in file'))
+        # status and file name
+        text_rect = QtCore.QRect(
+            x, y + self.thumb_w, self.thumb_w,
+            rect.bottom() - self.margin - (y + self.thumb_w))
+        status = image.get_status()
+        status_w = 0
+        if status:
+            painter.setFont(self.status_label.font())
+            painter.drawText(
+                text_rect, flag_to_int(Qt.AlignmentFlag.AlignLeft)
+                | flag_to_int(Qt.AlignmentFlag.AlignVCenter), status)
+            status_w = width_for_text(self.status_label, status)
+        painter.setFont(self.name_label.font())
+        elided_name = self.name_label.fontMetrics().elidedText(
+            image.name, Qt.TextElideMode.ElideLeft, self.thumb_w - status_w)
+        painter.drawText(
+            text_rect, flag_to_int(Qt.AlignmentFlag.AlignRight)
+            | flag_to_int(Qt.AlignmentFlag.AlignVCenter), elided_name)
+        painter.restore()
+
+
+class ThumbnailView(QtWidgets.QListView):
+    """Multi-row fixed-width or single-row variable-width grid of
+    thumbnails, according to height. Only visible thumbnails are drawn.
+
+    """
+    dropped_images = QtSignal(list)
+    multi_row_changed = QtSignal()
+
+    def __init__(self, image_list, *args, **kwds):
+        super(ThumbnailView, self).__init__(*args, **kwds)
+        self.app = QtWidgets.QApplication.instance()
+        self.image_list = image_list
+        self.multi_row = None
+        self.drag_start_pos = None
+        self.setViewMode(self.ViewMode.IconMode)
+        self.setFlow(self.Flow.LeftToRight)
+        self.setMovement(self.Movement.Static)
+        self.setResizeMode(self.ResizeMode.Adjust)
+        self.setLayoutMode(self.LayoutMode.Batched)
+        self.setUniformItemSizes(True)
+        self.setSpacing(0)
+        self.setSelectionMode(self.SelectionMode.NoSelection)
+        self.setEditTriggers(self.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(self.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollMode(self.ScrollMode.ScrollPerPixel)
+        self.setDragEnabled(False)
+        self.setAcceptDrops(True)
+
+    def set_cell_size(self, size):
+        self.setGridSize(size)
+        self.set_multi_row()
+
+    def image_at(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return None
+        return self.image_list.images[index.row()]
+
+    @staticmethod
+    def event_pos(event):
+        if qt_version_info >= (6, 0):
+            return event.position().toPoint()
+        return event.pos()
+
+    def set_multi_row(self):
+        row_height = self.gridSize().height()
+        bar_height = self.horizontalScrollBar().sizeHint().height()
+        margins = self.contentsMargins()
+        self.setMinimumHeight(
+            row_height + bar_height + margins.top() + margins.bottom())
+        multi_row = self.contentsRect().height() - bar_height > row_height
+        if multi_row == self.multi_row:
+            return
+        self.multi_row = multi_row
+        self.setWrapping(multi_row)
+        # make selected item visible after redrawing has finished
+        QtCore.QTimer.singleShot(0, self.multi_row_changed.emit)
+
+    @catch_all
+    def resizeEvent(self, event):
+        super(ThumbnailView, self).resizeEvent(event)
+        self.set_multi_row()
+
+    @catch_all
+    def keyPressEvent(self, event):
+        # keyboard navigation is done by shortcuts in ImageList
+        event.ignore()
+
     @catch_all
     def contextMenuEvent(self, event):
+        if not self.image_at(event.pos()):
+            return
         menu = QtWidgets.QMenu(self)
-        self.app.image_list.add_selected_actions(menu)
+        self.image_list.add_selected_actions(menu)
         execute(menu, event.globalPos())
 
     @catch_all
     def mousePressEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
-            if qt_version_info >= (6, 0):
-                self.drag_start_pos = event.position()
-            else:
-                self.drag_start_pos = event.pos()
+        if event.button() != Qt.MouseButton.LeftButton:
+            return
+        self.drag_start_pos = self.event_pos(event)
+        if not self.image_at(self.drag_start_pos):
+            self.image_list.select_images([])
 
     @catch_all
     def mouseReleaseEvent(self, event):
+        image = self.image_at(self.event_pos(event))
+        if not image:
+            return
         if event.modifiers() == Qt.KeyboardModifier.ControlModifier:
-            self.app.image_list.select_image(self, multiple_selection=True)
+            self.image_list.select_image(image, multiple_selection=True)
         elif event.modifiers() == Qt.KeyboardModifier.ShiftModifier:
-            self.app.image_list.select_image(self, extend_selection=True)
+            self.image_list.select_image(image, extend_selection=True)
         else:
-            self.app.image_list.select_image(self)
+            self.image_list.select_image(image)
+
+    @catch_all
+    def mouseDoubleClickEvent(self, event):
+        image = self.image_at(self.event_pos(event))
+        if image and event.modifiers() == Qt.KeyboardModifier.NoModifier:
+            QtGui.QDesktopServices.openUrl(
+                QtCore.QUrl.fromLocalFile(image.path))
 
     @catch_all
     def mouseMoveEvent(self, event):
-        if not self.app.image_list.drag_icon:
+        if not (self.image_list.drag_icon and self.drag_start_pos):
             return
-        if qt_version_info >= (6, 0):
-            pos = event.position()
-        else:
-            pos = event.pos()
+        pos = self.event_pos(event)
         if ((pos - self.drag_start_pos).manhattanLength() <
                                     QtWidgets.QApplication.startDragDistance()):
             return
-        if not self.get_selected():
+        image = self.image_at(self.drag_start_pos)
+        self.drag_start_pos = None
+        if not image:
+            return
+        if not image.get_selected():
             # user has started dragging an unselected image
-            self.app.image_list.select_image(self, emit_selection=False)
+            self.image_list.select_image(image, emit_selection=False)
         paths = []
-        for image in self.app.image_list.get_selected_images():
+        for image in self.image_list.get_selected_images():
             paths.append(image.path)
         if not paths:
             return
         drag = QtGui.QDrag(self)
         # construct icon
         count = min(len(paths), 8)
-        src_icon = self.app.image_list.drag_icon
+        src_icon = self.image_list.drag_icon
         src_w = src_icon.width()
         src_h = src_icon.height()
         margin = (count - 1) * 4
@@ -264,8 +744,8 @@ class Image(QtWidgets.QFrame):
             finally:
                 del paint
         drag.setPixmap(icon)
-        if self.app.image_list.drag_hotspot:
-            x, y = self.app.image_list.drag_hotspot
+        if self.image_list.drag_hotspot:
+            x, y = self.image_list.drag_hotspot
         else:
             x, y = src_w // 2, src_h
         drag.setHotSpot(QtCore.QPoint(x, y + margin))
@@ -275,89 +755,7 @@ class Image(QtWidgets.QFrame):
         if execute(drag,
                    Qt.DropAction.CopyAction) == Qt.DropAction.IgnoreAction:
             # image wasn't dragged to map
-            self.app.image_list.emit_selection()
-
-    @catch_all
-    def mouseDoubleClickEvent(self, event):
-        if event.modifiers() == Qt.KeyboardModifier.NoModifier:
-            QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(self.path))
-
-    def show_status(self, changed):
-        status = ''
-        # set 'geotagged' status
-        if self.metadata.gps_info['exif:GPSLatitude']:
-            status += chr(0x2690)
-        # set 'unsaved' status
-        if changed:
-            status += chr(0x26A1)
-        self.status.setText(status)
-        self._elide_name()
-        if changed:
-            self.app.image_list.new_metadata.emit(True)
-
-    def _elide_name(self):
-        self.status.adjustSize()
-        elided_name = self.label.fontMetrics().elidedText(
-            self.name, Qt.TextElideMode.ElideLeft,
-            self.image.width() - self.status.width())
-        self.label.setText(elided_name)
-
-    def _set_thumb_size(self, thumb_size):
-        width = width_for_text(self.label, 'X' * thumb_size * 20) // 6
-        self.image.setFixedSize(width, width)
-        self._elide_name()
-
-    def set_thumb_size(self, thumb_size):
-        self._set_thumb_size(thumb_size)
-        self.load_thumbnail()
-
-    def load_thumbnail(self, label=None):
-        label = label or self.image
-        image = self.metadata.thumbnail and self.metadata.thumbnail['image']
-        if not image:
-            label.setText(wrap_text(
-                label, translate('ImageList', 'No thumbnail in file'), lines=4))
-            return
-        pixmap = QtGui.QPixmap.fromImage(image)
-        pixmap = self.transform(pixmap, self.metadata.orientation)
-        rect = label.contentsRect()
-        label.setPixmap(
-            pixmap.scaled(rect.width(), rect.height(),
-                          Qt.AspectRatioMode.KeepAspectRatio,
-                          Qt.TransformationMode.SmoothTransformation))
-
-    def set_selected(self, value):
-        self.selected = value
-        if self.selected:
-            self.setStyleSheet("#thumbnail {border: 2px solid red}")
-        else:
-            self.setStyleSheet("#thumbnail {border: 2px solid grey}")
-
-    def get_selected(self):
-        return self.selected
-
-
-class ScrollArea(QtWidgets.QScrollArea):
-    dropped_images = QtSignal(list)
-
-    def __init__(self, parent=None):
-        super(ScrollArea, self).__init__(parent)
-        self.setWidgetResizable(True)
-        self.setAcceptDrops(True)
-        widget = QtWidgets.QWidget()
-        self.thumbs = ThumbsLayout(scroll_area=self)
-        widget.setLayout(self.thumbs)
-        self.setWidget(widget)
-        # adopt some layout methods & signals
-        self.add_widget = self.thumbs.addWidget
-        self.remove_widget = self.thumbs.removeWidget
-        self.multi_row_changed = self.thumbs.multi_row_changed
-
-    @catch_all
-    def ensureWidgetVisible(self, widget):
-        left, top, right, bottom = self.thumbs.getContentsMargins()
-        super(ScrollArea, self).ensureWidgetVisible(
-            widget, max(left, right), max(top, bottom))
+            self.image_list.emit_selection()
 
     @catch_all
     def dropEvent(self, event):
@@ -373,117 +771,9 @@ class ScrollArea(QtWidgets.QScrollArea):
             event.acceptProposedAction()
 
     @catch_all
-    def resizeEvent(self, event):
-        super(ScrollArea, self).resizeEvent(event)
-        self.thumbs.do_layout()
-
-    def usable_size(self):
-        rect = self.contentsRect()
-        width = rect.width() - self.verticalScrollBar().sizeHint().width()
-        height = rect.height() - self.horizontalScrollBar().sizeHint().height()
-        return width, height
-
-    def set_minimum_height(self, min_height):
-        bar = self.horizontalScrollBar()
-        if bar.isVisible():
-            min_height += bar.height()
-        margins = self.contentsMargins()
-        self.setMinimumHeight(min_height + margins.top() + margins.bottom())
-
-
-class ThumbsLayout(QtWidgets.QLayout):
-    """Multi-row fixed-width or single-row variable-width grid of
-    thumbnail widgets, according to height.
-
-    """
-    multi_row_changed = QtSignal()
-
-    def __init__(self, scroll_area=None, **kw):
-        super(ThumbsLayout, self).__init__(**kw)
-        self.scroll_area = scroll_area
-        self.item_list = []
-        self.multi_row = None
-        self.do_layout()
-
-    def addItem(self, item):
-        self.item_list.append(item)
-
-    def horizontalSpacing(self):
-        return 0
-
-    def verticalSpacing(self):
-        return 0
-
-    def count(self):
-        return len(self.item_list)
-
-    def itemAt(self, idx):
-        if idx < 0 or idx >= len(self.item_list):
-            return None
-        return self.item_list[idx]
-
-    def takeAt(self, idx):
-        if idx < 0 or idx >= len(self.item_list):
-            return None
-        return self.item_list.pop(idx)
-
-    def expandingDirections(self):
-        return 0
-
-    def hasHeightForWidth(self):
-        return False
-
-    @catch_all
-    def setGeometry(self, rect):
-        super(ThumbsLayout, self).setGeometry(rect)
-        self.do_layout(rect)
-
-    def sizeHint(self):
-        return self.size_hint
-
-    def minimumSize(self):
-        return self.size_hint
-
-    def do_layout(self, rect=None):
-        left, top, right, bottom = self.getContentsMargins()
-        width_hint = left + right
-        height_hint = top + bottom
-        if self.item_list and self.scroll_area:
-            item_size = self.item_list[0].sizeHint()
-            item_h = item_size.height()
-            item_w = item_size.width()
-            row_height = item_h + height_hint
-            self.scroll_area.set_minimum_height(row_height)
-            view_width, view_height = self.scroll_area.usable_size()
-            multi_row = view_height > row_height
-            if multi_row != self.multi_row:
-                self.multi_row = multi_row
-                # make selected item visible after redrawing has finished
-                QtCore.QTimer.singleShot(0, self.multi_row_changed.emit)
-            if multi_row:
-                columns = max((view_width - width_hint) // item_w, 1)
-                rows = (len(self.item_list) + columns - 1) // columns
-            else:
-                columns = len(self.item_list)
-                rows = 1
-            width_hint += columns * item_w
-            height_hint += rows * item_h
-        self.size_hint = QtCore.QSize(width_hint, height_hint)
-        widget = self.parentWidget()
-        if widget:
-            widget.setMinimumSize(self.size_hint)
-        if not (rect and self.item_list):
-            return
-        if QtWidgets.QApplication.isRightToLeft():
-            x = rect.right() - right - item_w
-            item_w = -item_w
-        else:
-            x = rect.left() + left
-        y = rect.top() + top
-        for n, item in enumerate(self.item_list):
-            i, j = n % columns, n // columns
-            item.setGeometry(QtCore.QRect(
-                QtCore.QPoint(x + (i * item_w), y + (j * item_h)), item_size))
+    def dragMoveEvent(self, event):
+        if event.mimeData().hasFormat('text/uri-list'):
+            event.acceptProposedAction()
 
 
 class ImageList(QtWidgets.QWidget):
@@ -497,8 +787,44 @@ class ImageList(QtWidgets.QWidget):
         self.app = QtWidgets.QApplication.instance()
         self.drag_icon = None
         self.images = []
+        # path to image mapping
+        self.paths = {}
+        # selected images, used as an ordered set
+        self.selection = {}
         self.last_selected = None
+        # distinct values of metadata fields in the current selection,
+        # shared by all tabs
+        self.distinct_cache = {}
+        # coalesce rapid changes of selection
+        self.selection_timer = QtCore.QTimer(self)
+        self.selection_timer.setSingleShot(True)
+        self.selection_timer.setInterval(50)
+        self.selection_timer.timeout.connect(self._emit_selection)
         self.selection_anchor = None
+        self.loaders = []
+        self.loading = set()
+        self.verifiers = []
+        self.saver = None
+        # thumbnails for files without one, and scaled thumbnail pixmaps
+        self.thumb_cache = None
+        cache_size = self.app.config_store.get('thumbnails', 'cache_size', 100)
+        if cache_size:
+            try:
+                self.thumb_cache = ThumbnailCache(
+                    max_size=cache_size * 1024 * 1024)
+            except Exception as ex:
+                logger.exception(ex)
+        self.pixmap_cache = cachetools.LRUCache(
+            self.app.config_store.get('thumbnails', 'memory_cache', 200)
+            * 1024 * 1024,
+            getsizeof=lambda x: x.width() * x.height() * 4)
+        self.app.aboutToQuit.connect(self.stop_loading)
+        self.metadata_index = None
+        if self.app.config_store.get('metadata', 'use_index', True):
+            try:
+                self.metadata_index = MetadataIndex()
+            except Exception as ex:
+                logger.exception(ex)
         self.thumb_size = self.app.config_store.get('controls', 'thumb_size', 4)
         if self.thumb_size > 20:
             # old config, in pixels
@@ -506,25 +832,31 @@ class ImageList(QtWidgets.QWidget):
         # thumbnail display
         self.setLayout(QtWidgets.QVBoxLayout())
         self.layout().setContentsMargins(0, 0, 0, 0)
-        self.scroll_area = ScrollArea()
-        self.scroll_area.dropped_images.connect(self.open_file_list)
-        self.scroll_area.multi_row_changed.connect(
+        self.model = ThumbnailModel(self.images, parent=self)
+        self.delegate = ThumbnailDelegate(self.images, parent=self)
+        self.delegate.set_thumb_size(self.thumb_size)
+        self.thumbs_view = ThumbnailView(self)
+        self.thumbs_view.setModel(self.model)
+        self.thumbs_view.setItemDelegate(self.delegate)
+        self.thumbs_view.set_cell_size(self.delegate.cell_size)
+        self.thumbs_view.dropped_images.connect(self.open_file_list)
+        self.thumbs_view.multi_row_changed.connect(
             self._ensure_selected_visible)
-        self.layout().addWidget(self.scroll_area)
+        self.layout().addWidget(self.thumbs_view)
         QtGui2.QShortcut(QtGui.QKeySequence.StandardKey.MoveToPreviousChar,
-                         self.scroll_area, self.move_to_prev_thumb)
+                         self.thumbs_view, self.move_to_prev_thumb)
         QtGui2.QShortcut(QtGui.QKeySequence.StandardKey.MoveToNextChar,
-                         self.scroll_area, self.move_to_next_thumb)
+                         self.thumbs_view, self.move_to_next_thumb)
         QtGui2.QShortcut(QtGui.QKeySequence.StandardKey.MoveToStartOfLine,
-                         self.scroll_area, self.move_to_first_thumb)
+                         self.thumbs_view, self.move_to_first_thumb)
         QtGui2.QShortcut(QtGui.QKeySequence.StandardKey.MoveToEndOfLine,
-                         self.scroll_area, self.move_to_last_thumb)
+                         self.thumbs_view, self.move_to_last_thumb)
         QtGui2.QShortcut(QtGui.QKeySequence.StandardKey.SelectPreviousChar,
-                         self.scroll_area, self.select_prev_thumb)
+                         self.thumbs_view, self.select_prev_thumb)
         QtGui2.QShortcut(QtGui.QKeySequence.StandardKey.SelectNextChar,
-                         self.scroll_area, self.select_next_thumb)
+                         self.thumbs_view, self.select_next_thumb)
         QtGui2.QShortcut(QtGui.QKeySequence.StandardKey.SelectAll,
-                         self.scroll_area, self.select_all)
+                         self.thumbs_view, self.select_all)
         # sort key selector
         bottom_bar = QtWidgets.QHBoxLayout()
         self.layout().addLayout(bottom_bar)
@@ -563,22 +895,11 @@ class ImageList(QtWidgets.QWidget):
         self.drag_hotspot = hotspot
 
     def get_image(self, path):
-        for image in self.images:
-            if image.path == path:
-                return image
-        return None
+        return self.paths.get(path)
 
     def get_images(self):
         return self.images
 
-    @catch_all
-    def mousePressEvent(self, event):
-        if self.scroll_area.underMouse():
-            self._clear_selection()
-            self.last_selected = None
-            self.selection_anchor = None
-            self.emit_selection()
-
     @QtSlot(bool)
     @catch_all
     def open_files(self, checked=False):
@@ -601,33 +922,93 @@ class ImageList(QtWidgets.QWidget):
 
     @QtSlot(list)
     @catch_all
-    def open_file_list(self, path_list, top_level=True, dir_list=[]):
-        last_path = None
+    def open_file_list(self, path_list):
+        new_paths = []
+        for path in self._expand_path_list(path_list, True, []):
+            path = self._resolve_path(path)
+            if not path or path in self.loading:
+                continue
+            if self.get_image(path):
+                # already opened this path
+                continue
+            self.loading.add(path)
+            new_paths.append(path)
+        if not new_paths:
+            return
+        # read metadata in separate threads, so GUI can continue
+        max_workers = self.app.config_store.get(
+            'metadata', 'load_threads', 0) or None
+        loader = MetadataLoader(new_paths, index=self.metadata_index,
+                                thumb_cache=self.thumb_cache,
+                                max_workers=max_workers)
+        thread = QtCore.QThread(self)
+        loader.moveToThread(thread)
+        loader.new_metadata.connect(self._new_metadata)
+        thread.started.connect(loader.start)
+        loader.finished.connect(thread.quit)
+        thread.finished.connect(self._loader_finished)
+        self.loaders.append((loader, thread))
+        if len(self.loaders) == 1:
+            QtWidgets.QApplication.setOverrideCursor(Qt.CursorShape.BusyCursor)
+        thread.start()
+
+    def _expand_path_list(self, path_list, top_level, dir_list):
         types = ['.' + x for x in (image_types_lower() + video_types_lower())]
-        with Busy():
-            for path in path_list:
-                if os.path.basename(path).startswith('.'):
-                    # don't open .directory or .thumbs
+        for path in path_list:
+            if os.path.basename(path).startswith('.'):
+                # don't open .directory or .thumbs
+                continue
+            if os.path.isdir(path):
+                path = os.path.realpath(path)
+                if path in dir_list:
+                    # don't open directories we've already opened
                     continue
-                if os.path.isdir(path):
-                    path = os.path.realpath(path)
-                    if path in dir_list:
-                        # don't open directories we've already opened
-                        continue
-                    dir_list.append(path)
-                    last_path = self.open_file_list(
-                        [os.path.join(path, x) for x in os.listdir(path)],
-                        top_level=False, dir_list=dir_list) or last_path
-                elif (not top_level and
-                          os.path.splitext(path)[1].lower() not in types):
-                    pass
-                elif self.open_file(path):
-                    last_path = path
-        if top_level and last_path:
-            self.done_opening(last_path)
-        return last_path
+                dir_list.append(path)
+                yield from self._expand_path_list(
+                    [os.path.join(path, x) for x in os.listdir(path)],
+                    False, dir_list)
+            elif (top_level or
+                      os.path.splitext(path)[1].lower() in types):
+                yield path
 
-    def open_file(self, path):
+    @QtSlot(list)
+    @catch_all
+    def _new_metadata(self, batch):
+        images = []
+        for path, metadata in batch:
+            self.loading.discard(path)
+            if self.get_image(path):
+                continue
+            images.append(Image(path, metadata=metadata))
+        self.add_images(images)
+
+    @QtSlot()
+    @catch_all
+    def _loader_finished(self):
+        for loader, thread in list(self.loaders):
+            if thread != self.sender():
+                continue
+            # thread is only deleted when no longer in self.loaders
+            self.loaders.remove((loader, thread))
+            thread.deleteLater()
+            self.loading.difference_update(loader.path_list)
+            if loader.running:
+                self.done_opening(loader.path_list[-1])
+        if not self.loaders:
+            QtWidgets.QApplication.restoreOverrideCursor()
+
+    @QtSlot()
+    @catch_all
+    def stop_loading(self):
+        workers = self.loaders + self.verifiers
+        for worker, thread in workers:
+            worker.running = False
+        # wait for threads to stop before Qt is shut down
+        for worker, thread in workers:
+            thread.quit()
+            thread.wait()
+
+    def _resolve_path(self, path):
         path = os.path.realpath(path)
         base, ext = os.path.splitext(path)
         if ext.lower() == '.xmp':
@@ -641,34 +1022,32 @@ class ImageList(QtWidgets.QWidget):
                     if b == base and e.lower() != '.xmp':
                         break
                 else:
-                    return False
+                    return None
         if not os.path.isfile(path):
+            return None
+        return path
+
+    def open_file(self, path):
+        path = self._resolve_path(path)
+        if not path:
             return False
         if self.get_image(path):
             # already opened this path
             return True
-        image = Image(path, thumb_size=self.thumb_size)
-        self.images.append(image)
-        self.show_thumbnail(image)
+        self.add_images([Image(path)])
         return True
 
     def done_opening(self, path):
         self.app.config_store.set(
             'paths', 'images', os.path.dirname(os.path.abspath(path)))
-        self._sort_thumbnails()
+        # images are inserted in order, so no need to sort
+        if self.last_selected:
+            self._ensure_visible(self.last_selected)
+        self.image_list_changed.emit()
 
-    def _date_key(self, image):
-        result = (image.metadata.date_taken or image.metadata.date_digitised
-                  or image.metadata.date_modified)
-        if result:
-            result = result['datetime']
-        else:
-            # use file date as last resort
-            result = datetime.fromtimestamp(os.path.getmtime(image.path))
-        # convert result to string and append path so photos with same
-        # time stamp get sorted consistently
-        result = result.strftime('%Y%m%d%H%M%S%f') + image.path
-        return result
+    def _sort_key(self):
+        sort_date = self.sort_date.isChecked()
+        return lambda x: x.sort_key(sort_date)
 
     @QtSlot()
     @catch_all
@@ -680,32 +1059,33 @@ class ImageList(QtWidgets.QWidget):
     @catch_all
     def _ensure_selected_visible(self):
         if self.last_selected:
-            self.scroll_area.ensureWidgetVisible(self.last_selected)
+            self._ensure_visible(self.last_selected)
+
+    def _ensure_visible(self, image):
+        self.thumbs_view.scrollTo(
+            self.model.index(self.model.row(image)),
+            QtWidgets.QAbstractItemView.ScrollHint.EnsureVisible)
+
+    def image_changed(self, image):
+        # only visible thumbnails are redrawn
+        self.thumbs_view.viewport().update()
 
     def _sort_thumbnails(self):
         sort_date = self.sort_date.isChecked()
         self.app.config_store.set('controls', 'sort_date', sort_date)
         with Busy():
-            if sort_date:
-                self.images.sort(key=self._date_key)
-            else:
-                self.images.sort(key=lambda x: x.path)
-            for image in self.images:
-                self.show_thumbnail(image, False)
+            self.model.sort_images(self._sort_key())
         if self.last_selected:
-            self.app.processEvents()
-            self.scroll_area.ensureWidgetVisible(self.last_selected)
+            self._ensure_visible(self.last_selected)
         self.image_list_changed.emit()
 
-    def show_thumbnail(self, image, live=True):
-        self.scroll_area.add_widget(image)
-        if live:
-            self.app.processEvents()
-        image.load_thumbnail()
-        if live:
-            self.app.processEvents()
-            self.scroll_area.ensureWidgetVisible(image)
-            self.app.processEvents()
+    def add_images(self, images):
+        if not images:
+            return
+        for image in images:
+            self.paths[image.path] = image
+        self.model.insert_images(images, self._sort_key())
+        self._ensure_visible(images[-1])
 
     def add_selected_actions(self, menu):
         actions = {}
@@ -796,7 +1176,8 @@ class ImageList(QtWidgets.QWidget):
             undo = {}
             table.clearContents()
             new_md = image.metadata
-            old_md = Metadata(image.path)
+            # only the items compared below are read from the file
+            old_md = Metadata(image.path, lazy=True)
             for key in ('title', 'headline', 'description', 'alt_text',
                         'alt_text_ext', 'keywords', 'rating',
                         'creator', 'creator_title', 'credit_line', 'copyright',
@@ -884,11 +1265,11 @@ class ImageList(QtWidgets.QWidget):
             close_list = self.get_selected_images()
         if not close_list:
             return
-        idx = self.images.index(close_list[0])
+        idx = self.model.row(close_list[0])
         for image in close_list:
-            self.images.remove(image)
-            self.scroll_area.remove_widget(image)
-            image.setParent(None)
+            del self.paths[image.path]
+            self.selection.pop(image, None)
+        self.model.remove_images(close_list)
         if 0 <= idx < len(self.images):
             self.select_image(self.images[idx])
         else:
@@ -903,6 +1284,9 @@ class ImageList(QtWidgets.QWidget):
         self._save_files(self.images)
 
     def _save_files(self, images=[]):
+        if self.saver:
+            # already saving
+            return
         self._flush_editing()
         if_mode = self.app.config_store.get('files', 'image', True)
         sc_mode = self.app.config_store.get('files', 'sidecar', 'auto')
@@ -912,23 +1296,137 @@ class ImageList(QtWidgets.QWidget):
         if isinstance(keep_time, bool):
             # old config format
             keep_time = ('now', 'keep')[keep_time]
+        verify = self.app.config_store.get('files', 'verify', 'full')
         if not images:
             images = self.images
-        with Busy():
-            for image in images:
-                if keep_time == 'taken' and image.metadata.date_taken:
-                    file_times = (
-                        image.file_times[0],
-                        image.metadata.date_taken['datetime'].timestamp())
-                elif keep_time == 'keep':
-                    file_times = image.file_times
-                else:
-                    file_times = None
-                image.metadata.save(
-                    if_mode=if_mode, sc_mode=sc_mode,
-                    iptc_mode=iptc_mode, file_times=file_times)
+        # get values to save in GUI thread, then write files in a
+        # thread pool
+        jobs = []
+        for image in images:
+            if not image.metadata.changed():
+                continue
+            if keep_time == 'taken' and image.metadata.date_taken:
+                file_times = (
+                    image.file_times[0],
+                    image.metadata.date_taken['datetime'].timestamp())
+            elif keep_time == 'keep':
+                file_times = image.file_times
+            else:
+                file_times = None
+            jobs.append((image.path, image.metadata,
+                         image.metadata.get_save_values(), {
+                             'if_mode': if_mode, 'sc_mode': sc_mode,
+                             'iptc_mode': iptc_mode, 'file_times': file_times,
+                             'verify': verify}))
+        saved = []
+        if jobs:
+            saved = self._run_saver(jobs)
+        unverified = []
+        for path, metadata, values, kw in jobs:
+            if path not in saved:
+                # cancelled or failed
+                continue
+            for file_path, tags in metadata.unverified:
+                unverified.append((path, file_path, tags))
         unsaved = any([image.metadata.changed() for image in self.images])
         self.new_metadata.emit(unsaved)
+        if unverified:
+            self._verify_saved(unverified)
+
+    def _run_saver(self, jobs):
+        max_workers = self.app.config_store.get(
+            'files', 'save_threads', 0) or None
+        saver = MetadataSaver(jobs, max_workers=max_workers)
+        thread = QtCore.QThread(self)
+        saver.moveToThread(thread)
+        dialog = QtWidgets.QProgressDialog(
+            translate('ImageList', 'Saving files...'),
+            translate('ImageList', 'Cancel'), 0, len(jobs), self)
+        dialog.setWindowTitle(translate('ImageList', 'Photini: saving'))
+        # modal dialog stops metadata being edited during the save
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(0)
+        dialog.setAutoClose(False)
+        dialog.setValue(0)
+        dialog.show()
+        values = dict((path, values) for (path, metadata, values, kw) in jobs)
+        self.saver = saver, dialog, [], set(), values
+        dialog.canceled.connect(self._stop_saving)
+        saver.saved.connect(self._file_saved)
+        thread.started.connect(saver.start)
+        saver.finished.connect(thread.quit)
+        thread.finished.connect(thread.deleteLater)
+        # wait for saver to finish, without blocking the GUI
+        loop = QtCore.QEventLoop()
+        thread.finished.connect(loop.quit)
+        with Busy():
+            thread.start()
+            execute(loop)
+        saver, dialog, failed, saved, values = self.saver
+        self.saver = None
+        dialog.close()
+        if not failed:
+            return saved
+        dialog = QtWidgets.QMessageBox(parent=self)
+        dialog.setWindowTitle(translate('ImageList', 'Photini: save failed'))
+        dialog.setText('<h3>{}</h3>'.format(translate(
+            'ImageList', 'Some files could not be saved.')))
+        dialog.setInformativeText(translate(
+            'ImageList', 'See the log window for details.'))
+        dialog.setDetailedText('\n'.join(failed))
+        dialog.setIcon(dialog.Icon.Warning)
+        dialog.setStandardButtons(dialog.StandardButton.Ok)
+        execute(dialog)
+        return saved
+
+    @QtSlot(str, bool)
+    @catch_all
+    def _file_saved(self, path, OK):
+        saver, dialog, failed, saved, values = self.saver
+        image = self.get_image(path)
+        if OK:
+            saved.add(path)
+            # don't lose any changes made since the values were got
+            if image and all(getattr(image.metadata, k) == v
+                             for (k, v) in values[path].items()):
+                image.metadata.set_saved()
+        else:
+            failed.append(path)
+        dialog.setValue(dialog.value() + 1)
+
+    @QtSlot()
+    @catch_all
+    def _stop_saving(self):
+        if self.saver:
+            self.saver[0].running = False
+
+    def _verify_saved(self, unverified):
+        verifier = SaveVerifier(unverified)
+        thread = QtCore.QThread(self)
+        verifier.moveToThread(thread)
+        verifier.failed.connect(self._verify_failed)
+        thread.started.connect(verifier.start)
+        verifier.finished.connect(thread.quit)
+        thread.finished.connect(self._verifier_finished)
+        self.verifiers.append((verifier, thread))
+        thread.start()
+
+    @QtSlot(str)
+    @catch_all
+    def _verify_failed(self, path):
+        image = self.get_image(path)
+        if image:
+            # mark image as not saved, so user can try again
+            image.metadata.dirty = True
+            image.show_status(True)
+
+    @QtSlot()
+    @catch_all
+    def _verifier_finished(self):
+        for verifier, thread in list(self.verifiers):
+            if thread == self.sender():
+                self.verifiers.remove((verifier, thread))
+                thread.deleteLater()
 
     def unsaved_files_dialog(
             self, all_files=False, with_cancel=True, with_discard=True):
@@ -966,15 +1464,62 @@ class ImageList(QtWidgets.QWidget):
             current_focus.clearFocus()
 
     def get_selected_images(self):
-        selection = []
-        for image in self.images:
-            if image.get_selected():
-                selection.append(image)
-        return selection
+        return sorted(self.selection, key=self.model.row)
+
+    def selection_updated(self, image):
+        if image.selected:
+            self.selection[image] = None
+        else:
+            self.selection.pop(image, None)
+        self.image_changed(image)
 
     def emit_selection(self):
+        self.selection_timer.start()
+
+    @QtSlot()
+    @catch_all
+    def _emit_selection(self):
+        self.distinct_cache = {}
         self.selection_changed.emit(self.get_selected_images())
 
+    def distinct_values(self, images, key, get_value=None):
+        """Return a list of the different values of a metadata field in
+        a list of images, in order of first appearance.
+
+        The result is cached until the selection changes or one of the
+        values is replaced, so tabs showing the same field share the
+        work.
+
+        """
+        if get_value:
+            raw_values = [get_value(image, key) for image in images]
+        else:
+            raw_values = [getattr(image.metadata, key) for image in images]
+        cache_key = key, get_value
+        if cache_key in self.distinct_cache:
+            cached_images, cached_raw, values = self.distinct_cache[cache_key]
+            if cached_images == images and len(cached_raw) == len(
+                    raw_values) and all(
+                        x is y for (x, y) in zip(cached_raw, raw_values)):
+                return list(values)
+        values = []
+        seen = set()
+        unhashable = []
+        for value in raw_values:
+            try:
+                value_key = hash_key(value)
+            except TypeError:
+                # fall back to slow comparison
+                if value not in unhashable:
+                    unhashable.append(value)
+                    values.append(value)
+                continue
+            if value_key not in seen:
+                seen.add(value_key)
+                values.append(value)
+        self.distinct_cache[cache_key] = list(images), raw_values, values
+        return list(values)
+
     def select_all(self):
         for image in self.images:
             image.set_selected(True)
@@ -1002,7 +1547,7 @@ class ImageList(QtWidgets.QWidget):
 
     def _inc_selection(self, inc, extend_selection=False):
         if self.last_selected:
-            idx = self.images.index(self.last_selected)
+            idx = self.model.row(self.last_selected)
             idx = (idx + inc) % len(self.images)
         else:
             idx = 0
@@ -1013,21 +1558,20 @@ class ImageList(QtWidgets.QWidget):
     def _new_thumb_size(self, value):
         self.thumb_size = value
         self.app.config_store.set('controls', 'thumb_size', self.thumb_size)
-        for image in self.images:
-            image.set_thumb_size(self.thumb_size)
+        self.delegate.set_thumb_size(self.thumb_size)
+        self.thumbs_view.set_cell_size(self.delegate.cell_size)
         if self.last_selected:
-            self.app.processEvents()
-            self.scroll_area.ensureWidgetVisible(self.last_selected)
+            self._ensure_visible(self.last_selected)
 
     def select_image(self, image, extend_selection=False,
                      multiple_selection=False, emit_selection=True):
-        self.scroll_area.ensureWidgetVisible(image)
+        self._ensure_visible(image)
         if extend_selection and self.selection_anchor:
-            idx1 = self.images.index(self.selection_anchor)
-            idx2 = self.images.index(self.last_selected)
+            idx1 = self.model.row(self.selection_anchor)
+            idx2 = self.model.row(self.last_selected)
             for i in range(min(idx1, idx2), max(idx1, idx2) + 1):
                 self.images[i].set_selected(False)
-            idx2 = self.images.index(image)
+            idx2 = self.model.row(image)
             for i in range(min(idx1, idx2), max(idx1, idx2) + 1):
                 self.images[i].set_selected(True)
         elif multiple_selection:
@@ -1050,12 +1594,11 @@ class ImageList(QtWidgets.QWidget):
             return
         for image in images:
             image.set_selected(True)
-            self.scroll_area.ensureWidgetVisible(image)
+        self._ensure_visible(images[-1])
         self.selection_anchor = images[0]
         self.last_selected = images[-1]
         self.emit_selection()
 
     def _clear_selection(self):
-        for image in self.images:
-            if image.get_selected():
-                image.set_selected(False)
+        for image in list(self.selection):
+            image.set_selected(False)
@@ -17,20 +17,26 @@
 ##  <http://www.gnu.org/licenses/>.
 
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
+import hashlib
 import logging
 import os
+import queue
 import re
 import shutil
 import sys
+import threading
 
 try:
     import gphoto2 as gp
 except ImportError:
     gp = None
 
-from photini.metadata import Metadata
+from photini.importledger import (
+    CHUNK_SIZE, ImportLedger, file_partial_hash, partial_hash)
+from photini.metadata import scan_file
 from photini.pyqt import *
 from photini.pyqt import image_types_lower, qt_version_info, video_types_lower
 from photini.widgets import ComboBox, PushButton, StartStopButton
@@ -39,66 +45,275 @@ logger = logging.getLogger(__name__)
 translate = QtCore.QCoreApplication.translate
 
 
+def _copy_data(src, dst, verify, buf_size=4 * 1024 * 1024):
+    if not verify:
+        # let the kernel copy the data if possible
+        size = os.fstat(src.fileno()).st_size
+        for name in ('copy_file_range', 'sendfile'):
+            func = getattr(os, name, None)
+            if not func:
+                continue
+            try:
+                done = 0
+                while done < size:
+                    if name == 'sendfile':
+                        count = func(dst.fileno(), src.fileno(), done,
+                                     min(size - done, 1 << 30))
+                    else:
+                        count = func(src.fileno(), dst.fileno(),
+                                     min(size - done, 1 << 30))
+                    if not count:
+                        break
+                    done += count
+                if done == size:
+                    return None
+            except OSError:
+                pass
+            # not supported for these files, or stopped short, so try
+            # another way
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+        shutil.copyfileobj(src, dst, buf_size)
+        return None
+    checksum = hashlib.blake2b()
+    buf = bytearray(buf_size)
+    view = memoryview(buf)
+    while True:
+        count = src.readinto(buf)
+        if not count:
+            break
+        checksum.update(view[:count])
+        dst.write(view[:count])
+    return checksum.hexdigest()
+
+
+def _file_checksum(path, buf_size=4 * 1024 * 1024):
+    checksum = hashlib.blake2b()
+    buf = bytearray(buf_size)
+    view = memoryview(buf)
+    with open(path, 'rb') as f:
+        while True:
+            count = f.readinto(buf)
+            if not count:
+                break
+            checksum.update(view[:count])
+    return checksum.hexdigest()
+
+
+def copy_file(src_path, dest_path, verify=True):
+    """Copy a file via a temporary file in the destination directory,
+    which is renamed to ``dest_path`` only when complete.
+
+    If ``verify`` is set the data is checksummed as it's copied and the
+    copy is read back to check it, and its checksum is returned.
+
+    """
+    dest_dir, dest_name = os.path.split(dest_path)
+    tmp_path = os.path.join(dest_dir, '.' + dest_name + '.part')
+    try:
+        with open(src_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            checksum = _copy_data(src, dst, verify)
+        if verify and _file_checksum(tmp_path) != checksum:
+            raise OSError('Checksum error copying {}'.format(src_path))
+        shutil.copystat(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return checksum
+
+
+def move_file(src_path, dest_path, verify=True):
+    if os.stat(src_path).st_dev == os.stat(os.path.dirname(dest_path)).st_dev:
+        os.replace(src_path, dest_path)
+        return None
+    checksum = copy_file(src_path, dest_path, verify=verify)
+    os.unlink(src_path)
+    return checksum
+
+
 class FolderSource(object):
     image_types = ['.' + x for x in image_types_lower() + video_types_lower()]
 
     def __init__(self, root):
         self.root = root
+        # cached listing of each directory, keyed by path
+        self.dir_cache = {}
+        self.watcher = None
+        self.watched = set()
+        self.changed_dirs = set()
+        # partial hashes, keyed by path, size and modification time
+        self.hashes = {}
+        config_store = QtWidgets.QApplication.instance().config_store
+        if config_store.get('importer', 'watch_folders', False):
+            # directories that haven't changed don't need scanning at all,
+            # but file contents changing in place are not detected
+            self.watcher = QtCore.QFileSystemWatcher()
+            self.watcher.directoryChanged.connect(self.changed_dirs.add)
+
+    def _scan_file(self, path, sc_path, stat):
+        metadata = scan_file(path)
+        timestamp = metadata['date_taken']
+        if not timestamp:
+            timestamp = metadata['date_digitised']
+        if not timestamp:
+            timestamp = metadata['date_modified']
+        if not timestamp:
+            # use file date as last resort
+            timestamp = datetime.fromtimestamp(stat.st_mtime)
+        else:
+            timestamp = timestamp['datetime']
+        camera = metadata['camera_model']
+        if camera:
+            camera = camera['model']
+        return {
+            'camera'    : camera,
+            'path'      : path,
+            'sc_path'   : sc_path,
+            'name'      : os.path.basename(path),
+            'size'      : stat.st_size,
+            'timestamp' : timestamp,
+            }
+
+    def _list_dir(self, path):
+        cached = self.dir_cache.get(path)
+        if cached and path in self.watched and path not in self.changed_dirs:
+            return cached
+        self.changed_dirs.discard(path)
+        old_files = cached and cached[1] or {}
+        subdirs = []
+        entries = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        # ignore special directories such as .thumbs
+                        if entry.name[0] != '.':
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        entries[entry.name] = entry
+        except OSError as ex:
+            logger.error(str(ex))
+            return [], {}
+        files = {}
+        for name, entry in entries.items():
+            base, ext = os.path.splitext(name)
+            if ext.lower() not in self.image_types:
+                continue
+            sc_entry = None
+            for sc_name in (base + '.xmp', base + '.XMP', base + '.Xmp',
+                            name + '.xmp', name + '.XMP', name + '.Xmp'):
+                if sc_name in entries:
+                    sc_entry = entries[sc_name]
+                    break
+            try:
+                stat = entry.stat()
+                sc_mtime = sc_entry and sc_entry.stat().st_mtime_ns
+            except OSError as ex:
+                logger.error(str(ex))
+                continue
+            key = stat.st_size, stat.st_mtime_ns, sc_mtime
+            if name in old_files and old_files[name][0] == key:
+                data = old_files[name][1]
+            else:
+                data = self._scan_file(
+                    entry.path, sc_entry and sc_entry.path, stat)
+            files[name] = key, data
+        result = subdirs, files
+        self.dir_cache[path] = result
+        if self.watcher and path not in self.watched:
+            if self.watcher.addPath(path):
+                self.watched.add(path)
+        return result
 
     def get_file_data(self):
         if not os.path.isdir(self.root):
             return None
-        file_list = []
-        for root, dirs, files in os.walk(self.root):
-            # ignore special directories such as .thumbs
-            dirs[:] = [x for x in dirs if x[0] != '.']
-            for name in files:
-                base, ext = os.path.splitext(name)
-                if ext.lower() in self.image_types:
-                    file_list.append(os.path.join(root, name))
+        # only files that are new or changed since the last call are read
         file_data = {}
-        for path in file_list:
-            metadata = Metadata(path)
-            timestamp = metadata.date_taken
-            if not timestamp:
-                timestamp = metadata.date_digitised
-            if not timestamp:
-                timestamp = metadata.date_modified
-            if not timestamp:
-                # use file date as last resort
-                timestamp = datetime.fromtimestamp(os.path.getmtime(path))
-            else:
-                timestamp = timestamp['datetime']
-            sc_path = metadata.find_sidecar()
-            name = os.path.basename(path)
-            camera = metadata.camera_model
-            if camera:
-                camera = camera['model']
-            file_data[name] = {
-                'camera'    : camera,
-                'path'      : path,
-                'sc_path'   : sc_path,
-                'name'      : name,
-                'timestamp' : timestamp,
-                }
+        visited = set()
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            visited.add(path)
+            subdirs, files = self._list_dir(path)
+            stack.extend(reversed(subdirs))
+            for key, data in files.values():
+                file_data[data['name']] = dict(data)
+        for path in list(self.dir_cache):
+            if path not in visited:
+                del self.dir_cache[path]
+                if path in self.watched:
+                    self.watcher.removePath(path)
+                    self.watched.discard(path)
         return file_data
 
+    def close(self):
+        # release watches, directories will be rescanned when next used
+        if self.watched:
+            self.watcher.removePaths(list(self.watched))
+            self.watched.clear()
+
+    def partial_hash(self, info):
+        try:
+            stat = os.stat(info['path'])
+            key = info['path'], stat.st_size, stat.st_mtime_ns
+            if key not in self.hashes:
+                self.hashes[key] = file_partial_hash(info['path'])[1]
+        except OSError as ex:
+            logger.error(str(ex))
+            return None
+        return self.hashes[key]
+
+    def file_checksum(self, info):
+        return _file_checksum(info['path'])
+
+    def _copy_file(self, info, move, verify):
+        dest_path = info['dest_path']
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        sc_file = info['sc_path']
+        transfer = move_file if move else copy_file
+        info['checksum'] = transfer(info['path'], dest_path, verify=verify)
+        if sc_file:
+            transfer(sc_file, dest_path + '.xmp', verify=verify)
+        return info
+
     def copy_files(self, info_list, move):
-        for info in info_list:
-            dest_path = info['dest_path']
-            dest_dir = os.path.dirname(dest_path)
-            if not os.path.isdir(dest_dir):
-                os.makedirs(dest_dir)
-            sc_file = info['sc_path']
-            if move:
-                shutil.move(info['path'], dest_path)
-                if sc_file:
-                    shutil.move(sc_file, dest_path + '.xmp')
-            else:
-                shutil.copy2(info['path'], dest_path)
-                if sc_file:
-                    shutil.copy2(sc_file, dest_path + '.xmp')
-            yield info
+        config_store = QtWidgets.QApplication.instance().config_store
+        workers = max(int(config_store.get('importer', 'copy_workers', 4)), 1)
+        verify = config_store.get('importer', 'verify_copy', True)
+        # copy several files at once, but yield results in order
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for info in info_list:
+                    pending.append(executor.submit(
+                        self._copy_file, info, move, verify))
+                    if len(pending) >= workers * 2:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                # don't start any more copies if stopped early
+                for future in pending:
+                    future.cancel()
+
+
+class CameraFileData(dict):
+    """File data that fetches a camera file's size and timestamp the
+    first time either is used."""
+    def __init__(self, source, *args, **kwds):
+        super(CameraFileData, self).__init__(*args, **kwds)
+        self.source = source
+
+    def __missing__(self, key):
+        if key not in ('size', 'timestamp'):
+            raise KeyError(key)
+        info = self.source.get_file_info(self['folder'], self['name'])
+        self.update(info)
+        return info[key]
 
 
 class CameraSource(object):
@@ -107,9 +322,12 @@ class CameraSource(object):
     def __init__(self, model, port_name):
         self.model = model
         self.port_name = port_name
+        self.camera = None
+        self.lock = threading.RLock()
+        # file info for each folder, valid while its listing is unchanged
+        self.folder_cache = {}
 
-    @contextmanager
-    def session(self):
+    def _open(self):
         # initialise camera
         camera = gp.Camera()
         # search ports for camera port name
@@ -120,19 +338,46 @@ class CameraSource(object):
         camera.init()
         # check camera is the right model
         if camera.get_abilities().model != self.model:
-            raise RuntimeError('Camera model mismatch')
-        try:
-            yield camera
-        finally:
             camera.exit()
+            raise RuntimeError('Camera model mismatch')
+        return camera
+
+    def close(self):
+        with self.lock:
+            if self.camera:
+                try:
+                    self.camera.exit()
+                except gp.GPhoto2Error:
+                    pass
+                self.camera = None
+
+    @contextmanager
+    def session(self):
+        # the same session is used until the source is closed
+        with self.lock:
+            if not self.camera:
+                self.camera = self._open()
+            try:
+                yield self.camera
+            except gp.GPhoto2Error:
+                # camera may have been disconnected
+                self.close()
+                raise
 
     def _list_files(self, camera, path='/'):
-        result = []
         # get files
+        names = []
         for name, value in camera.folder_list_files(path):
             base, ext = os.path.splitext(name)
             if ext.lower() in self.image_types:
-                result.append(os.path.join(path, name))
+                names.append(name)
+        names = tuple(names)
+        cached = self.folder_cache.get(path)
+        if not cached or cached[0] != names:
+            old_files = cached and cached[1] or {}
+            self.folder_cache[path] = names, dict(
+                (name, old_files.get(name, {})) for name in names)
+        result = [(path, name) for name in names]
         # get folders
         folders = []
         for name, value in camera.folder_list_folders(path):
@@ -142,68 +387,127 @@ class CameraSource(object):
             result.extend(self._list_files(camera, os.path.join(path, name)))
         return result
 
-    def get_file_data(self):
-        with self.session() as camera:
-            try:
-                file_list = self._list_files(camera)
-            except gp.GPhoto2Error:
-                # camera is no longer visible
+    def _partial_hash(self, camera, folder, name, size):
+        # read start and end of file without copying all of it
+        try:
+            head = bytearray(min(size, CHUNK_SIZE))
+            count = camera.file_read(
+                folder, name, gp.GP_FILE_TYPE_NORMAL, 0, head)
+            if count != len(head):
                 return None
-            file_data = {}
-            for path in file_list:
-                folder, name = os.path.split(path)
-                try:
-                    info = camera.file_get_info(str(folder), str(name))
-                except gp.GPhoto2Error:
+            tail = bytearray(0)
+            if size > CHUNK_SIZE:
+                offset = max(size - CHUNK_SIZE, CHUNK_SIZE)
+                tail = bytearray(size - offset)
+                count = camera.file_read(
+                    folder, name, gp.GP_FILE_TYPE_NORMAL, offset, tail)
+                if count != len(tail):
                     return None
-                timestamp = datetime.utcfromtimestamp(info.file.mtime)
-                file_data[name] = {
-                    'camera'    : self.model,
-                    'folder'    : folder,
-                    'name'      : name,
-                    'timestamp' : timestamp,
-                    }
+        except gp.GPhoto2Error:
+            return None
+        return partial_hash(size, head, tail)
+
+    def get_file_info(self, folder, name, with_hash=False):
+        fields = self.folder_cache.get(folder, (None, {}))[1].get(name, {})
+        if 'timestamp' in fields and ('hash' in fields or not with_hash):
+            return fields
+        with self.session() as camera:
+            if 'timestamp' not in fields:
+                info = camera.file_get_info(str(folder), str(name))
+                fields['timestamp'] = datetime.utcfromtimestamp(
+                    info.file.mtime)
+                fields['size'] = info.file.size
+            if with_hash:
+                fields['hash'] = self._partial_hash(
+                    camera, folder, name, fields['size'])
+        return fields
+
+    def get_file_data(self):
+        file_data = {}
+        try:
+            with self.session() as camera:
+                for folder, name in self._list_files(camera):
+                    data = CameraFileData(self, {
+                        'camera'    : self.model,
+                        'folder'    : folder,
+                        'name'      : name,
+                        })
+                    # other info is only fetched when needed
+                    data.update(self.folder_cache[folder][1][name])
+                    file_data[name] = data
+        except gp.GPhoto2Error:
+            # camera is no longer visible
+            return None
         return file_data
 
+    def partial_hash(self, info):
+        try:
+            return self.get_file_info(
+                info['folder'], info['name'], with_hash=True)['hash']
+        except gp.GPhoto2Error:
+            return None
+
+    def file_checksum(self, info):
+        # would need to copy the whole file
+        return None
+
     def copy_files(self, info_list, move):
-        with self.session() as camera:
-            for info in info_list:
-                dest_dir = os.path.dirname(info['dest_path'])
-                if not os.path.isdir(dest_dir):
-                    os.makedirs(dest_dir)
+        for info in info_list:
+            dest_dir = os.path.dirname(info['dest_path'])
+            if not os.path.isdir(dest_dir):
+                os.makedirs(dest_dir)
+            # release camera between files so it can be used elsewhere
+            with self.session() as camera:
+                info.update(self.get_file_info(info['folder'], info['name']))
                 camera_file = camera.file_get(
                     info['folder'], info['name'], gp.GP_FILE_TYPE_NORMAL)
                 camera_file.save(info['dest_path'])
                 if move:
                     camera.file_delete(info['folder'], info['name'])
-                yield info
+            yield info
 
 
 class FileCopier(QtCore.QObject):
-    def __init__(self, source, copy_list, move, copier_result, *args, **kwds):
+    output = QtSignal()
+
+    def __init__(self, source, copy_list, move, with_hash=False,
+                 *args, **kwds):
         super(FileCopier, self).__init__(*args, **kwds)
         self.source = source
         self.copy_list = copy_list
         self.move = move
-        self.copier_result = copier_result
+        self.with_hash = with_hash
+        self.results = queue.Queue(maxsize=64)
+        self.status = 'ok'
         self.running = True
 
     @QtSlot()
     @catch_all
     def start(self):
-        status = 'ok'
         try:
             for info in self.source.copy_files(self.copy_list, self.move):
-                self.copier_result.append((info, status))
-                # wait for image display to show previous image(s)
-                while self.running and len(self.copier_result) > 1:
-                    QtCore.QThread.yieldCurrentThread()
+                if self.with_hash:
+                    # hash the local copy, for the import ledger
+                    try:
+                        info['size'], info['hash'] = file_partial_hash(
+                            info['dest_path'])
+                    except OSError as ex:
+                        logger.error(str(ex))
+                # only wait for the display if it's a long way behind
+                while self.running:
+                    try:
+                        self.results.put(info, timeout=0.5)
+                    except queue.Full:
+                        continue
+                    self.output.emit()
+                    break
                 if not self.running:
                     break
         except Exception as ex:
-            status = str(ex)
-            logger.error(status)
-        self.copier_result.append(({}, status))
+            self.status = str(ex)
+            logger.error(self.status)
+        finally:
+            self.thread().quit()
 
 
 def get_camera_list():
@@ -255,7 +559,9 @@ class NameMangler(QtCore.QObject):
             result = self.format_string.format(**subst)
         except (KeyError, ValueError):
             result = self.format_string
-        # then do timestamp
+        # then do timestamp, if needed
+        if '%' not in result:
+            return result
         return file_data['timestamp'].strftime(result)
 
 
@@ -279,7 +585,7 @@ class ImporterTab(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super(ImporterTab, self).__init__(parent)
         self.app = QtWidgets.QApplication.instance()
-        self.app.aboutToQuit.connect(self.stop_copy)
+        self.app.aboutToQuit.connect(self.shutdown)
         if gp and self.app.options.test:
             self.gp_log = gp.check_result(gp.use_python_logging())
         self.config_store = self.app.config_store
@@ -290,6 +596,13 @@ class ImporterTab(QtWidgets.QWidget):
         self.file_list = []
         self.source = None
         self.file_copier = None
+        self.copier_thread = None
+        self.ledger = None
+        if self.config_store.get('importer', 'use_ledger', True):
+            try:
+                self.ledger = ImportLedger()
+            except Exception as ex:
+                logger.exception(ex)
         self.updating = QtCore.QMutex()
         # source selector
         box = QtWidgets.QHBoxLayout()
@@ -370,6 +683,9 @@ class ImporterTab(QtWidgets.QWidget):
     @QtSlot(int)
     @catch_all
     def new_source(self, idx):
+        # a source that's being copied from is closed by copy_finished
+        if self.source and not self.file_copier:
+            self.source.close()
         self.source = None
         item_data = self.source_selector.itemData(idx)
         if not item_data:
@@ -568,7 +884,7 @@ class ImporterTab(QtWidgets.QWidget):
             file_data['dest_path'] = dest_path
             item = QtWidgets.QListWidgetItem(name + ' -> ' + dest_path)
             item.setData(Qt.ItemDataRole.UserRole, name)
-            if os.path.exists(dest_path):
+            if os.path.exists(dest_path) or self.already_imported(file_data):
                 item.setFlags(Qt.ItemFlag.NoItemFlags)
             else:
                 if not first_active:
@@ -581,6 +897,15 @@ class ImporterTab(QtWidgets.QWidget):
         self.file_list_widget.scrollToItem(
             first_active, self.file_list_widget.ScrollHint.PositionAtTop)
 
+    def already_imported(self, file_data):
+        if not self.ledger:
+            return False
+        if 'imported' not in file_data:
+            file_data['imported'] = self.ledger.is_imported(
+                file_data, self.source, full_hash=self.config_store.get(
+                    'importer', 'full_hash', False))
+        return file_data['imported']
+
     @QtSlot()
     @catch_all
     def selection_changed(self):
@@ -625,8 +950,8 @@ class ImporterTab(QtWidgets.QWidget):
             if not (item.flags() & Qt.ItemFlag.ItemIsSelectable):
                 continue
             name = item.data(Qt.ItemDataRole.UserRole)
-            timestamp = self.file_data[name]['timestamp']
-            if timestamp > since:
+            if (since == datetime.min
+                    or self.file_data[name]['timestamp'] > since):
                 if not first_active:
                     first_active = item
                 item.setSelected(True)
@@ -643,65 +968,82 @@ class ImporterTab(QtWidgets.QWidget):
     @QtSlot()
     @catch_all
     def copy_selected(self, move=False):
-        with Busy():
-            copy_list = []
-            for item in self.file_list_widget.selectedItems():
-                name = item.data(Qt.ItemDataRole.UserRole)
-                info = self.file_data[name]
-                if (move and 'path' in info and
-                        self.app.image_list.get_image(info['path'])):
-                    # don't rename an open file
-                    logger.warning(
-                        'Please close image %s before moving it', info['name'])
-                else:
-                    copy_list.append(info)
-            if not copy_list:
-                return
-            if move:
-                self.move_button.set_checked(True)
-                self.copy_button.setEnabled(False)
+        if self.file_copier:
+            return
+        copy_list = []
+        self.copy_items = {}
+        for item in self.file_list_widget.selectedItems():
+            name = item.data(Qt.ItemDataRole.UserRole)
+            info = self.file_data[name]
+            if (move and 'path' in info and
+                    self.app.image_list.get_image(info['path'])):
+                # don't rename an open file
+                logger.warning(
+                    'Please close image %s before moving it', info['name'])
             else:
-                self.copy_button.set_checked(True)
-                self.move_button.setEnabled(False)
-            last_file_copied = None, datetime.min
-            copier_result = deque()
-            # start file copier in a separate thread
-            self.file_copier = FileCopier(
-                self.source, copy_list, move, copier_result)
-            copier_thread = QtCore.QThread(self)
-            self.file_copier.moveToThread(copier_thread)
-            copier_thread.started.connect(self.file_copier.start)
-            copier_thread.start()
-            # show files as they're copied
-            while self.file_copier.running:
-                if copier_result:
-                    info, status = copier_result.popleft()
-                    if not info:
-                        # copier thread has finished
-                        break
-                    if status != 'ok':
-                        self._fail()
-                        break
-                    if last_file_copied[1] < info['timestamp']:
-                        last_file_copied = info['dest_path'], info['timestamp']
-                    for n in range(self.file_list_widget.count()):
-                        item = self.file_list_widget.item(n)
-                        if item.data(Qt.ItemDataRole.UserRole) == info['name']:
-                            item.setFlags(Qt.ItemFlag.NoItemFlags)
-                            self.file_list_widget.scrollToItem(
-                                item,
-                                self.file_list_widget.ScrollHint.PositionAtTop)
-                            self.selection_changed()
-                            break
-                    self.app.image_list.open_file(info['dest_path'])
-                else:
-                    # wait for copier result
-                    self.app.processEvents()
-            self.move_button.set_checked(False)
-            self.copy_button.set_checked(False)
-            self.file_copier = None
-            copier_thread.quit()
-            copier_thread.wait()
+                copy_list.append(info)
+                self.copy_items[name] = item
+        if not copy_list:
+            return
+        if move:
+            self.move_button.set_checked(True)
+            self.copy_button.setEnabled(False)
+        else:
+            self.copy_button.set_checked(True)
+            self.move_button.setEnabled(False)
+        self.last_file_copied = None, datetime.min
+        # start file copier in a separate thread
+        self.file_copier = FileCopier(
+            self.source, copy_list, move, with_hash=bool(self.ledger))
+        self.copier_thread = QtCore.QThread(self)
+        self.file_copier.moveToThread(self.copier_thread)
+        self.file_copier.output.connect(self.show_copied)
+        self.copier_thread.started.connect(self.file_copier.start)
+        self.copier_thread.finished.connect(self.copy_finished)
+        self.copier_thread.start()
+
+    @QtSlot()
+    @catch_all
+    def show_copied(self):
+        if not self.file_copier:
+            return
+        # show files as they're copied
+        while True:
+            try:
+                info = self.file_copier.results.get_nowait()
+            except queue.Empty:
+                break
+            if self.last_file_copied[1] < info['timestamp']:
+                self.last_file_copied = info['dest_path'], info['timestamp']
+            if self.ledger and info.get('hash'):
+                self.ledger.add(info['name'], info['size'], info['hash'],
+                                info.get('checksum'), info['dest_path'])
+            item = self.copy_items.get(info['name'])
+            if item:
+                item.setFlags(Qt.ItemFlag.NoItemFlags)
+                self.file_list_widget.scrollToItem(
+                    item, self.file_list_widget.ScrollHint.PositionAtTop)
+            self.app.image_list.open_file(info['dest_path'])
+        self.selection_changed()
+
+    @QtSlot()
+    @catch_all
+    def copy_finished(self):
+        self.show_copied()
+        status = self.file_copier.status
+        source = self.file_copier.source
+        self.move_button.set_checked(False)
+        self.copy_button.set_checked(False)
+        self.file_copier = None
+        self.copier_thread.wait()
+        self.copier_thread = None
+        if source is not self.source:
+            # user selected another source during the copy
+            source.close()
+        self.copy_items = {}
+        if status != 'ok':
+            self._fail()
+        last_file_copied = self.last_file_copied
         if last_file_copied[0]:
             self.config_store.set(self.config_section, 'last_transfer',
                                   last_file_copied[1].isoformat(' '))
@@ -715,7 +1057,18 @@ class ImporterTab(QtWidgets.QWidget):
             self.file_copier.running = False
             self.move_button.setEnabled(False)
             self.copy_button.setEnabled(False)
-            self.app.processEvents()
+
+    @QtSlot()
+    @catch_all
+    def shutdown(self):
+        self.stop_copy()
+        if self.copier_thread:
+            # allow files being copied to be completed
+            self.copier_thread.wait()
+            if self.file_copier.source is not self.source:
+                self.file_copier.source.close()
+        if self.source:
+            self.source.close()
 
 
 class TabWidget(ImporterTab):
@@ -0,0 +1,128 @@
+##  Photini - a simple photo metadata editor.
+##  http://github.com/jim-easterbrook/Photini
+##  Copyright (C) 2023  Jim Easterbrook  jim@jim-easterbrook.me.uk
+##
+##  This program is free software: you can redistribute it and/or
+##  modify it under the terms of the GNU General Public License as
+##  published by the Free Software Foundation, either version 3 of the
+##  License, or (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program.  If not, see
+##  <http://www.gnu.org/licenses/>.
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import appdirs
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def partial_hash(size, head, tail):
+    """Hash of a file's size and its first and last ``CHUNK_SIZE``
+    bytes."""
+    checksum = hashlib.blake2b(digest_size=20)
+    checksum.update(str(size).encode('ascii'))
+    checksum.update(head)
+    checksum.update(tail)
+    return checksum.hexdigest()
+
+
+def file_partial_hash(path):
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(CHUNK_SIZE)
+        tail = b''
+        if size > CHUNK_SIZE:
+            f.seek(max(size - CHUNK_SIZE, CHUNK_SIZE))
+            tail = f.read(CHUNK_SIZE)
+    return size, partial_hash(size, head, tail)
+
+
+class ImportLedger(object):
+    """Record of every file imported, so files can be recognised as
+    already imported whatever they were renamed to.
+
+    Each file is recorded with its source name, size, and a hash of its
+    first and last megabyte. The full file checksum is also stored if it
+    was computed during import. Lookups are by source name, so only
+    files with a matching name and size need to be hashed.
+
+    """
+    def __init__(self, path=None):
+        self.path = path or os.path.join(
+            appdirs.user_data_dir('photini'), 'imports.db')
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS imported'
+                       ' (name TEXT, size INTEGER, partial TEXT, full TEXT,'
+                       ' dest_path TEXT, time REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS imported_name'
+                       ' ON imported (name)')
+
+    def connection(self):
+        # sqlite3 connections can't be shared between threads
+        db = getattr(self.local, 'db', None)
+        if not db:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            self.local.db = db
+        return db
+
+    def find(self, name):
+        """Return a list of (size, partial hash, full checksum or None)
+        of imported files whose source file was called ``name``."""
+        try:
+            with self.connection() as db:
+                return db.execute(
+                    'SELECT size, partial, full FROM imported WHERE name = ?',
+                    (name,)).fetchall()
+        except Exception as ex:
+            logger.exception(ex)
+            return []
+
+    def is_imported(self, info, source, full_hash=False):
+        """Return True if the file described by ``info`` has already
+        been imported from ``source``.
+
+        The name and size are checked before ``source.partial_hash``
+        is used to read any file data. If ``full_hash`` is set, and the
+        ledger has the file's checksum, ``source.file_checksum`` is also
+        checked.
+
+        """
+        candidates = self.find(info['name'])
+        if not candidates:
+            return False
+        candidates = [x for x in candidates if x[0] == info['size']]
+        if not candidates:
+            return False
+        partial = source.partial_hash(info)
+        checksums = [x[2] for x in candidates if x[1] == partial]
+        if not checksums:
+            return False
+        if full_hash and any(checksums):
+            return source.file_checksum(info) in checksums
+        return True
+
+    def add(self, name, size, partial, full, dest_path):
+        try:
+            with self.connection() as db:
+                db.execute('INSERT INTO imported VALUES (?, ?, ?, ?, ?, ?)',
+                           (name, size, partial, full, dest_path, time.time()))
+        except Exception as ex:
+            logger.exception(ex)
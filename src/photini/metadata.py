@@ -213,7 +213,7 @@ class ImageMetadata(MetadataHandler):
         else:
             self.set_xmp_value(tag, value)
 
-    def save(self, file_times=None, write_iptc=False):
+    def save(self, file_times=None, write_iptc=False, verify='full'):
         if self.read_only:
             return False
         if self.xmp_only:
@@ -229,10 +229,24 @@ class ImageMetadata(MetadataHandler):
             return True
         if file_times:
             os.utime(self._path, file_times)
-        # check that data really was saved
+        if verify in ('full', 'quick'):
+            return self.check_saved(
+                self._path, self.get_all_tags(), quick=verify == 'quick')
+        return True
+
+    @classmethod
+    def check_saved(cls, path, tags, quick=False):
+        # check that data really was saved, by comparing tag keys with
+        # a fresh read of the file (without transcoding in quick mode)
+        saved = ImageMetadata.open_old(path, transcode=not quick)
+        if not saved:
+            return False
+        saved_tags = set(saved.get_all_tags())
+        if quick and saved_tags.issuperset(tags):
+            return True
+        name = os.path.basename(path)
         OK = True
-        saved_tags = self.open_old(self._path).get_all_tags()
-        for tag in self.get_all_tags():
+        for tag in tags:
             if tag in saved_tags:
                 continue
             if tag in ('Exif.Image.GPSTag', 'Exif.MakerNote.ByteOrder',
@@ -245,9 +259,9 @@ class ImageMetadata(MetadataHandler):
                     'Canon', 'Casio', 'Fujif', 'Minol', 'Nikon', 'Olymp',
                     'Panas', 'Penta', 'Samsu', 'Sigma', 'Sony1'):
                 # maker note tags are often not saved
-                logger.warning('%s: tag not saved: %s', self._name, tag)
+                logger.warning('%s: tag not saved: %s', name, tag)
                 continue
-            logger.error('%s: tag not saved: %s', self._name, tag)
+            logger.error('%s: tag not saved: %s', name, tag)
             OK = False
         return OK
 
@@ -581,6 +595,49 @@ class SidecarMetadata(ImageMetadata):
             self.save()
 
 
+def find_sidecar(path):
+    for base in (os.path.splitext(path)[0], path):
+        for ext in ('.xmp', '.XMP', '.Xmp'):
+            sc_path = base + ext
+            if os.path.exists(sc_path):
+                return sc_path
+    return None
+
+
+def scan_file(path, names=('camera_model', 'date_digitised',
+                           'date_modified', 'date_taken')):
+    # Quickly read a few metadata items, e.g. to list or sort a large
+    # number of files. Each value is taken from the first file that has
+    # it, without merging or camera timezone correction. Strings are
+    # not transcoded, and ffprobe is only used if a video file has no
+    # date in its Exiv2 readable metadata.
+    result = dict.fromkeys(names)
+    mime_type = mimetypes.guess_type(path, strict=False)[0] or ''
+    is_video = mime_type.split('/')[0] == 'video'
+    handlers = [
+        SidecarMetadata.open_old(find_sidecar(path)),
+        ImageMetadata.open_old(path, quiet=is_video, transcode=False)]
+    dates = [x for x in names if x.startswith('date_')]
+    for name in names:
+        for handler in handlers:
+            if not handler:
+                continue
+            values = handler.read(name, Metadata._data_type[name])
+            if values:
+                result[name] = values[0][1]
+                break
+    if is_video and not any(result[x] for x in dates):
+        handler = FFMPEGMetadata.open_old(path)
+        if handler:
+            for name in names:
+                if result[name]:
+                    continue
+                values = handler.read(name, Metadata._data_type[name])
+                if values:
+                    result[name] = values[0][1]
+    return result
+
+
 class Metadata(object):
     # type of each Photini data field's data
     _data_type = {
@@ -618,21 +675,89 @@ class Metadata(object):
         'video_duration' : MD_VideoDuration,
         }
 
-    def __init__(self, path, notify=None):
+    def __init__(self, path, notify=None, index=None, lazy=False):
         super(Metadata, self).__init__()
-        # create metadata handlers for image file, video file, and sidecar
         self._path = path
         self._notify = notify
-        video_md = None
-        self._if = None
-        self._sc = SidecarMetadata.open_old(self.find_sidecar())
-        self._if = ImageMetadata.open_old(
-            path, quiet=self.get_mime_type().split('/')[0] == 'video')
+        # index entry is written after reading, removed after saving
+        self._metadata_index = index
+        # set while some Photini metadata items have not been read
+        self._lazy = False
+        self._video_md = None
+        self.dirty = False
+        # files saved without verification, set by write_files
+        self.unverified = []
+        sc_path = self.find_sidecar()
+        if index:
+            data = index.get(path, sc_path)
+            if data:
+                # image file and sidecar are opened when first needed
+                self.mime_type = data['mime_type']
+                self.iptc_in_file = data['iptc_in_file']
+                for name, value in data['fields'].items():
+                    super(Metadata, self).__setattr__(name, value)
+                return
+        # create metadata handlers for image file, video file, and sidecar
+        self._open_handlers(sc_path)
         self.mime_type = self.get_mime_type()
         if self.mime_type.split('/')[0] == 'video':
-            video_md = FFMPEGMetadata.open_old(path)
-        self.dirty = False
+            self._video_md = FFMPEGMetadata.open_old(path)
         self.iptc_in_file = self._if and self._if.has_iptc()
+        # in lazy mode each Photini metadata item is read when first
+        # used, materialise() must be called before editing
+        self._lazy = True
+        if not lazy:
+            self.materialise()
+
+    def materialise(self):
+        # read all Photini metadata items not already read
+        if not self._lazy:
+            return
+        for name in self._data_type:
+            getattr(self, name)
+        self._lazy = False
+        if self._metadata_index:
+            self._metadata_index.put(self._path, self.find_sidecar(), {
+                'mime_type': self.mime_type,
+                'iptc_in_file': self.iptc_in_file,
+                'fields': dict((k, getattr(self, k)) for k in self._data_type),
+                })
+
+    def _read_field(self, name):
+        # read data values from first file that has any
+        values = []
+        for handler in self._sc, self._video_md, self._if:
+            if not handler:
+                continue
+            values += handler.read(name, self._data_type[name])
+            if values and handler == self._sc:
+                break
+        # merge in camera timezone
+        if (name in ('date_digitised', 'date_modified', 'date_taken')
+                and self.timezone):
+            for n, (tag, value) in enumerate(values):
+                if not (tag.startswith('Exif') or
+                        tag.startswith('Xmp.video')):
+                    continue
+                value = dict(value)
+                value['tz_offset'] = self.timezone
+                values[n] = (tag, self._data_type[name](value))
+                logger.info('%s: merged camera timezone offset', tag)
+        # choose result and merge in non-matching data so user can review it
+        value = self._data_type[name](None)
+        if values:
+            info = '{}({})'.format(os.path.basename(self._path), name)
+            tag, value = values[0]
+            logger.debug('%s: set from %s', info, tag)
+        for tag2, value2 in values[1:]:
+            value = value.merge(info, tag2, value2)
+        return value
+
+    def _open_handlers(self, sc_path):
+        self._if = None
+        self._sc = SidecarMetadata.open_old(sc_path)
+        self._if = ImageMetadata.open_old(
+            self._path, quiet=self.get_mime_type().split('/')[0] == 'video')
         # get maker note info
         if self._if:
             self._maker_note = {
@@ -640,44 +765,25 @@ class Metadata(object):
                          self._if.get_value('Exif.Image.Make')),
                 'delete': False,
                 }
-        # read Photini metadata items
-        for name in ['timezone'] + list(self._data_type):
-            # read data values from first file that has any
-            values = []
-            for handler in self._sc, video_md, self._if:
-                if not handler:
-                    continue
-                values += handler.read(name, self._data_type[name])
-                if values and handler == self._sc:
-                    break
-            # merge in camera timezone
-            if (name in ('date_digitised', 'date_modified', 'date_taken')
-                    and self.timezone):
-                for n, (tag, value) in enumerate(values):
-                    if not (tag.startswith('Exif') or
-                            tag.startswith('Xmp.video')):
-                        continue
-                    value = dict(value)
-                    value['tz_offset'] = self.timezone
-                    values[n] = (tag, self._data_type[name](value))
-                    logger.info('%s: merged camera timezone offset', tag)
-            # choose result and merge in non-matching data so user can review it
-            value = self._data_type[name](None)
-            if values:
-                info = '{}({})'.format(os.path.basename(self._path), name)
-                tag, value = values[0]
-                logger.debug('%s: set from %s', info, tag)
-            for tag2, value2 in values[1:]:
-                value = value.merge(info, tag2, value2)
+
+    def __getattr__(self, name):
+        # only called if an attribute hasn't been set yet
+        if name in self._data_type and self._lazy:
+            # lazy mode, read item now
+            value = self._read_field(name)
             super(Metadata, self).__setattr__(name, value)
+            return value
+        if name in ('_if', '_sc'):
+            # metadata was read from index, open handlers now
+            self._open_handlers(self.find_sidecar())
+            return super(Metadata, self).__getattribute__(name)
+        raise AttributeError(name)
+
+    def set_notify(self, notify):
+        self._notify = notify
 
     def find_sidecar(self):
-        for base in (os.path.splitext(self._path)[0], self._path):
-            for ext in ('.xmp', '.XMP', '.Xmp'):
-                sc_path = base + ext
-                if os.path.exists(sc_path):
-                    return sc_path
-        return None
+        return find_sidecar(self._path)
 
     # Exiv2 uses the Exif.Image.Make value to decode Exif.Photo.MakerNote
     # If we change Exif.Image.Make we should delete Exif.Photo.MakerNote
@@ -701,19 +807,40 @@ class Metadata(object):
         image.save_file()
         return image._image
 
-    def _handler_save(self, handler, *arg, **kw):
+    def _handler_save(self, handler, values, *arg, verify='full', **kw):
         # store Photini metadata items
-        for name in self._data_type:
-            value = getattr(self, name)
+        for name, value in values.items():
             handler.write(name, value)
         # save file
-        return handler.save(*arg, **kw)
+        if verify != 'background':
+            return handler.save(*arg, verify=verify, **kw)
+        OK = handler.save(*arg, verify='none', **kw)
+        if OK and handler._path:
+            # caller will run check_saved later
+            self.unverified.append((handler._path, handler.get_all_tags()))
+        return OK
 
     def save(self, if_mode=True, sc_mode='auto',
-             iptc_mode='preserve', file_times=None):
+             iptc_mode='preserve', file_times=None, verify='full'):
+        self.unverified = []
         if not self.dirty:
             return
+        if self.write_files(self.get_save_values(), if_mode=if_mode,
+                            sc_mode=sc_mode, iptc_mode=iptc_mode,
+                            file_times=file_times, verify=verify):
+            self.set_saved()
+
+    def get_save_values(self):
+        # snapshot of Photini metadata items, for use by write_files
         self.software = 'Photini editor v' + __version__
+        return dict((name, getattr(self, name)) for name in self._data_type)
+
+    def write_files(self, values, if_mode=True, sc_mode='auto',
+                    iptc_mode='preserve', file_times=None, verify='full'):
+        # Write values from get_save_values to image file and/or
+        # sidecar. This doesn't use the Metadata object's attributes, so
+        # can be run in a worker thread.
+        self.unverified = []
         OK = False
         write_iptc = (iptc_mode == 'create'
                       or (iptc_mode == 'preserve' and self.iptc_in_file))
@@ -721,11 +848,12 @@ class Metadata(object):
             # save to image file
             if if_mode and self._if:
                 if self._maker_note['delete']:
-                    if not self.camera_change_ok(self.camera_model):
+                    if not self.camera_change_ok(values['camera_model']):
                         self._if.clear_maker_note()
                     self._maker_note['delete'] = False
                 OK = self._handler_save(
-                    self._if, file_times=file_times, write_iptc=write_iptc)
+                    self._if, values, file_times=file_times,
+                    write_iptc=write_iptc, verify=verify)
                 if OK:
                     self.iptc_in_file = write_iptc
             if not OK:
@@ -742,14 +870,21 @@ class Metadata(object):
                 else:
                     # workaround for bug in exiv2 xmp timestamp altering
                     self._sc.clear_dates()
-                    OK = self._handler_save(self._sc, file_times=file_times)
+                    OK = self._handler_save(
+                        self._sc, values, file_times=file_times,
+                        verify=verify)
         except Exception as ex:
             logger.exception(ex)
-            return
-        if OK:
-            self.dirty = False
-            if self._notify:
-                self._notify(self.dirty)
+            OK = False
+        if self._metadata_index:
+            # file has changed, even if its timestamps haven't
+            self._metadata_index.remove(self._path)
+        return OK
+
+    def set_saved(self):
+        self.dirty = False
+        if self._notify:
+            self._notify(self.dirty)
 
     def get_previews(self):
         if not self._if:
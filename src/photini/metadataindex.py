@@ -0,0 +1,135 @@
+##  Photini - a simple photo metadata editor.
+##  http://github.com/jim-easterbrook/Photini
+##  Copyright (C) 2023  Jim Easterbrook  jim@jim-easterbrook.me.uk
+##
+##  This program is free software: you can redistribute it and/or
+##  modify it under the terms of the GNU General Public License as
+##  published by the Free Software Foundation, either version 3 of the
+##  License, or (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program.  If not, see
+##  <http://www.gnu.org/licenses/>.
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import appdirs
+
+from photini import __version__
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataIndex(object):
+    """Persistent store of decoded metadata, so that files that haven't
+    changed since they were last opened can be read without parsing
+    them again.
+
+    Each entry is keyed by the file's real path and is only valid if
+    the file's size, modification time and status change time, and the
+    modification and status change times of its sidecar (if any), are
+    unchanged. The status change times can't be reset by a program that
+    preserves file timestamps. Entries that haven't been used for
+    ``max_age`` days are deleted when the index is opened.
+
+    """
+    schema = '2'
+
+    def __init__(self, path=None, max_age=90):
+        self.path = path or os.path.join(
+            appdirs.user_cache_dir('photini'), 'metadata.db')
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS info'
+                       ' (key TEXT PRIMARY KEY, value TEXT)')
+            # decoding may change with Photini version
+            row = db.execute(
+                'SELECT value FROM info WHERE key = ?', ('version',)).fetchone()
+            if not row or row[0] != __version__:
+                db.execute('DROP TABLE IF EXISTS metadata')
+                db.execute('INSERT OR REPLACE INTO info VALUES (?, ?)',
+                           ('version', __version__))
+            row = db.execute(
+                'SELECT value FROM info WHERE key = ?', ('schema',)).fetchone()
+            if not row or row[0] != self.schema:
+                db.execute('DROP TABLE IF EXISTS metadata')
+                db.execute('INSERT OR REPLACE INTO info VALUES (?, ?)',
+                           ('schema', self.schema))
+            db.execute('CREATE TABLE IF NOT EXISTS metadata'
+                       ' (path TEXT PRIMARY KEY, size INTEGER,'
+                       ' mtime INTEGER, ctime INTEGER, sc_mtime INTEGER,'
+                       ' sc_ctime INTEGER, used REAL, data BLOB)')
+            db.execute('DELETE FROM metadata WHERE used < ?',
+                       (time.time() - (max_age * 24 * 3600),))
+
+    def connection(self):
+        # sqlite3 connections can't be shared between threads
+        db = getattr(self.local, 'db', None)
+        if not db:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            self.local.db = db
+        return db
+
+    @staticmethod
+    def _key(path, sc_path):
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        sc_mtime, sc_ctime = 0, 0
+        if sc_path:
+            sc_stat = os.stat(sc_path)
+            sc_mtime, sc_ctime = sc_stat.st_mtime_ns, sc_stat.st_ctime_ns
+        return (path, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns,
+                sc_mtime, sc_ctime)
+
+    def get(self, path, sc_path):
+        try:
+            key = self._key(path, sc_path)
+            path = key[0]
+            with self.connection() as db:
+                row = db.execute(
+                    'SELECT size, mtime, ctime, sc_mtime, sc_ctime, data'
+                    ' FROM metadata WHERE path = ?', (path,)).fetchone()
+                if not row:
+                    return None
+                if row[:5] != key[1:]:
+                    db.execute('DELETE FROM metadata WHERE path = ?', (path,))
+                    return None
+                db.execute('UPDATE metadata SET used = ? WHERE path = ?',
+                           (time.time(), path))
+            return pickle.loads(row[5])
+        except Exception as ex:
+            logger.exception(ex)
+            return None
+
+    def put(self, path, sc_path, data):
+        try:
+            key = self._key(path, sc_path)
+            data = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            with self.connection() as db:
+                db.execute(
+                    'INSERT OR REPLACE INTO metadata'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    key + (time.time(), data))
+        except Exception as ex:
+            logger.exception(ex)
+
+    def remove(self, path):
+        try:
+            with self.connection() as db:
+                db.execute('DELETE FROM metadata WHERE path = ?',
+                           (os.path.realpath(path),))
+        except Exception as ex:
+            logger.exception(ex)
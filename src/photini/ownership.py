@@ -333,11 +333,8 @@ class TabWidget(QtWidgets.QWidget):
     def _update_widget(self, key, images):
         if not images:
             return
-        values = []
-        for image in images:
-            value = self._get_value(image, key)
-            if value not in values:
-                values.append(value)
+        values = self.app.image_list.distinct_values(
+            images, key, get_value=self._get_value)
         if len(values) > 1:
             self.widgets[key].set_multiple(choices=filter(None, values))
         else:
@@ -16,8 +16,9 @@
 ##  along with this program.  If not, see
 ##  <http://www.gnu.org/licenses/>.
 
-from datetime import timezone
+from datetime import timedelta, timezone
 import logging
+import math
 import os
 import pickle
 
@@ -205,10 +206,13 @@ class PhotiniMap(QtWidgets.QWidget):
         self.search_string = None
         self.map_loaded = 0     # not loaded
         self.marker_info = {}
+        # marker id for each location, for fast lookup
+        self.marker_index = {}
+        self.next_marker_id = 0
         self.map_status = {}
         self.dropped_images = []
         self.geocoder = self.get_geocoder()
-        self.gpx_ids = []
+        self.gpx_ids = set()
         self.widgets = {}
         self.setLayout(QtWidgets.QHBoxLayout())
         ## left side
@@ -269,6 +273,11 @@ class PhotiniMap(QtWidgets.QWidget):
             self.widgets['clear_gpx'].setEnabled(False)
             self.widgets['clear_gpx'].clicked.connect(self.clear_gpx)
             left_side.addWidget(self.widgets['clear_gpx'], 10, 1)
+            self.widgets['fit_gpx'] = QtWidgets.QPushButton(
+                translate('PhotiniMap', 'Fit camera clock to GPX'))
+            self.widgets['fit_gpx'].setEnabled(False)
+            self.widgets['fit_gpx'].clicked.connect(self.fit_from_gpx)
+            left_side.addWidget(self.widgets['fit_gpx'], 11, 1)
         self.layout().addLayout(left_side)
         # map
         # create handler for calls from JavaScript
@@ -361,10 +370,14 @@ class PhotiniMap(QtWidgets.QWidget):
 
     @catch_all
     def new_status(self, status):
+        zoom = self.map_status.get('zoom')
         self.map_status.update(status)
         for key in ('centre', 'zoom'):
             if key in status:
                 self.app.config_store.set('map', key, self.map_status[key])
+        if self.map_status.get('zoom') != zoom:
+            # marker clusters depend on zoom level
+            self.redraw_markers()
 
     @QtSlot(int, int, str)
     @catch_all
@@ -433,49 +446,107 @@ class PhotiniMap(QtWidgets.QWidget):
 
     def new_selection(self, selection, adjust_map=True):
         if 'set_from_gpx' in self.widgets:
-            self.widgets['set_from_gpx'].setEnabled(
-                bool(selection) and bool(self.app.gpx_importer.display_points))
+            enabled = bool(selection) and bool(
+                self.app.gpx_importer.display_points)
+            self.widgets['set_from_gpx'].setEnabled(enabled)
+            self.widgets['fit_gpx'].setEnabled(enabled)
         self.redraw_gps_track(selection)
         self.update_display(selection, adjust_map=adjust_map)
 
+    def cluster_locations(self, locations):
+        zoom = self.map_status.get('zoom')
+        if zoom is None or not self.app.config_store.get(
+                'map', 'cluster_markers', True):
+            return [[x] for x in locations]
+        # divide the world into square cells of about 64 pixels at the
+        # current zoom level, in Web Mercator projection
+        scale = (2 ** zoom) * 256 / 64
+        cells = {}
+        for location in locations:
+            lat, lng = location
+            lat = math.radians(max(min(lat, 85.0), -85.0))
+            cell = (int((lng + 180.0) / 360.0 * scale),
+                    int((1.0 - (math.asinh(math.tan(lat)) / math.pi))
+                        / 2.0 * scale))
+            if cell in cells:
+                cells[cell].append(location)
+            else:
+                cells[cell] = [location]
+        return list(cells.values())
+
     def redraw_markers(self):
         if self.map_loaded < 2:
             return
-        for info in self.marker_info.values():
-            info['images'] = []
-        # assign images to existing markers or create new markers
+        # group images by location
+        locations = {}
         for image in self.app.image_list.get_images():
             gps = image.metadata.gps_info
             if not gps['exif:GPSLatitude']:
                 continue
-            location = [float(gps['exif:GPSLatitude']),
-                        float(gps['exif:GPSLongitude'])]
-            for info in self.marker_info.values():
-                if info['location'] == location:
-                    info['images'].append(image)
-                    break
+            location = (float(gps['exif:GPSLatitude']),
+                        float(gps['exif:GPSLongitude']))
+            if location in locations:
+                locations[location].append(image)
             else:
-                for i in range(len(self.marker_info) + 2):
-                    marker_id = i
-                    if marker_id not in self.marker_info:
-                        break
-                self.marker_info[marker_id] = {
-                    'images'  : [image],
-                    'location': location,
-                    'selected': image.selected,
-                    }
-                self.JavaScript('addMarker({:d},{!r},{!r},{:d})'.format(
-                    marker_id, location[0], location[1], image.selected))
-        # delete redundant markers and enable markers with selected images
+                locations[location] = [image]
+        # combine nearby locations into clusters
+        markers = {}
+        for group in self.cluster_locations(locations):
+            if len(group) == 1:
+                key = group[0]
+            else:
+                key = (sum(x[0] for x in group) / len(group),
+                       sum(x[1] for x in group) / len(group), len(group))
+            images = []
+            for location in group:
+                images += locations[location]
+            markers[key] = group, images
+        # delete redundant markers
+        deleted = []
         for marker_id in list(self.marker_info.keys()):
-            info = self.marker_info[marker_id]
-            if not info['images']:
-                self.JavaScript('delMarker({:d})'.format(marker_id))
-                del self.marker_info[marker_id]
-            elif info['selected'] != any([x.selected for x in info['images']]):
-                info['selected'] = not info['selected']
-                self.JavaScript(
-                    'enableMarker({:d},{:d})'.format(marker_id, info['selected']))
+            key = self.marker_info[marker_id]['key']
+            if key in markers and self.marker_index.get(key) == marker_id:
+                continue
+            deleted.append(marker_id)
+            self._unindex_marker(marker_id)
+            del self.marker_info[marker_id]
+        # create new markers and enable markers with selected images
+        added = []
+        enabled = []
+        for key, (group, images) in markers.items():
+            selected = any(x.selected for x in images)
+            marker_id = self.marker_index.get(key)
+            if marker_id is not None:
+                info = self.marker_info[marker_id]
+                info['images'] = images
+                if info['selected'] != selected:
+                    info['selected'] = selected
+                    enabled.append([marker_id, int(selected)])
+                continue
+            marker_id = self.next_marker_id
+            self.next_marker_id += 1
+            self.marker_info[marker_id] = {
+                'images'   : images,
+                'key'      : key,
+                'location' : list(key[:2]),
+                'locations': group,
+                'selected' : selected,
+                }
+            self.marker_index[key] = marker_id
+            if len(group) == 1:
+                added.append([marker_id, key[0], key[1], int(selected)])
+            else:
+                added.append([marker_id, key[0], key[1], int(selected),
+                              len(images)])
+        if added or deleted or enabled:
+            self.JavaScript('updateMarkers({!r},{!r},{!r})'.format(
+                added, deleted, enabled))
+
+    def _unindex_marker(self, marker_id):
+        key = self.marker_info[marker_id]['key']
+        # another marker may have been dragged to the same location
+        if self.marker_index.get(key) == marker_id:
+            del self.marker_index[key]
 
     def redraw_gps_track(self, selected_images=None):
         if self.map_loaded < 2:
@@ -485,15 +556,16 @@ class PhotiniMap(QtWidgets.QWidget):
             return
         if not self.app.gpx_importer.display_points:
             self.JavaScript('clearGPS()')
-            self.gpx_ids = []
+            self.gpx_ids = set()
             return
-        # add any new points
+        # add any new points, if there are some
         new_points = []
-        for time_stamp, lat, lng in self.app.gpx_importer.display_points:
-            marker_id = time_stamp.isoformat()
-            if marker_id not in self.gpx_ids:
-                self.gpx_ids.append(marker_id)
-                new_points.append([lat, lng, marker_id])
+        if len(self.gpx_ids) < len(self.app.gpx_importer.display_points):
+            for time_stamp, lat, lng in self.app.gpx_importer.display_points:
+                marker_id = time_stamp.isoformat()
+                if marker_id not in self.gpx_ids:
+                    self.gpx_ids.add(marker_id)
+                    new_points.append([lat, lng, marker_id])
         if new_points:
             self.JavaScript('plotGPS({!r})'.format(new_points))
         # highlight points near selected picture
@@ -527,9 +599,10 @@ class PhotiniMap(QtWidgets.QWidget):
             time_stamp, lat, lng = p
             latlngs.append([lat, lng])
         self.JavaScript('fitPoints({!r})'.format(latlngs))
-        self.widgets['set_from_gpx'].setEnabled(
-            bool(self.app.image_list.get_selected_images())
-            and bool(self.app.gpx_importer.display_points))
+        enabled = bool(self.app.image_list.get_selected_images()) and bool(
+            self.app.gpx_importer.display_points)
+        self.widgets['set_from_gpx'].setEnabled(enabled)
+        self.widgets['fit_gpx'].setEnabled(enabled)
         self.widgets['clear_gpx'].setEnabled(
             bool(self.app.gpx_importer.display_points))
 
@@ -537,32 +610,95 @@ class PhotiniMap(QtWidgets.QWidget):
     @catch_all
     def set_from_gpx(self):
         selected_images = self.app.image_list.get_selected_images()
-        set_altitude = self.app.config_store.get('map', 'gpx_altitude', True)
-        changed = False
+        if self._set_coords_from_gpx(selected_images):
+            self.update_display(selected_images)
+
+    @staticmethod
+    def _utc_times(selected_images):
+        images = []
+        utc_times = []
         for image in selected_images:
             if not image.metadata.date_taken:
                 continue
             utc_time = image.metadata.date_taken.to_utc()
-            utc_time = utc_time.replace(tzinfo=timezone.utc)
-            candidates = self.app.gpx_importer.get_locations_at(utc_time)
-            if not candidates:
+            images.append(image)
+            utc_times.append(
+                utc_time.replace(tzinfo=timezone.utc).timestamp())
+        return images, utc_times
+
+    def _set_coords_from_gpx(self, selected_images):
+        set_altitude = self.app.config_store.get('map', 'gpx_altitude', True)
+        changed = False
+        images, utc_times = self._utc_times(selected_images)
+        locations = self.app.gpx_importer.get_locations_at(utc_times)
+        for image, location in zip(images, locations):
+            if not location:
                 continue
-            nearest = candidates[0]
-            for c in candidates[1:]:
-                if abs(c.time - utc_time) < abs(nearest.time - utc_time):
-                    nearest = c
+            lat, lng, ele = location
             gps = dict(image.metadata.gps_info)
-            gps['exif:GPSLatitude'] = nearest.latitude
-            gps['exif:GPSLongitude'] = nearest.longitude
-            if set_altitude and nearest.elevation is not None:
-                gps['exif:GPSAltitude'] = round(nearest.elevation, 1)
+            gps['exif:GPSLatitude'] = lat
+            gps['exif:GPSLongitude'] = lng
+            if set_altitude and ele is not None:
+                gps['exif:GPSAltitude'] = round(ele, 1)
             else:
                 gps['exif:GPSAltitude'] = None
             gps['method'] = 'GPS'
             image.metadata.gps_info = gps
             changed = True
-        if changed:
-            self.update_display(selected_images)
+        return changed
+
+    @QtSlot()
+    @catch_all
+    def fit_from_gpx(self):
+        selected_images = self.app.image_list.get_selected_images()
+        images, utc_times = self._utc_times(selected_images)
+        # manually set coordinates help find the clock error
+        known = []
+        for image in images:
+            gps = image.metadata.gps_info
+            if gps['exif:GPSLatitude'] and gps['method'] != 'GPS':
+                known.append((float(gps['exif:GPSLatitude']),
+                              float(gps['exif:GPSLongitude'])))
+            else:
+                known.append(None)
+        with Busy():
+            offset = self.app.gpx_importer.fit_offset(utc_times, known)
+        dialog = QtWidgets.QMessageBox(parent=self)
+        dialog.setWindowTitle(translate(
+            'PhotiniMap', 'Photini: fit camera clock'))
+        if offset is None:
+            dialog.setText('<h3>{}</h3>'.format(translate(
+                'PhotiniMap', 'No images were taken during the GPX track.')))
+            dialog.setIcon(dialog.Icon.Warning)
+            dialog.setStandardButtons(dialog.StandardButton.Ok)
+            execute(dialog)
+            return
+        sign = '-' if offset < 0 else '+'
+        delta = timedelta(seconds=abs(offset))
+        dialog.setText('<h3>{}</h3>'.format(translate(
+            'PhotiniMap', 'Camera clock offset appears to be {}.').format(
+                sign + str(delta))))
+        dialog.setInformativeText(translate(
+            'PhotiniMap', 'Adjust the times of {} images and set their'
+            ' coordinates from the GPX track?').format(len(images)))
+        dialog.setIcon(dialog.Icon.Question)
+        dialog.setStandardButtons(
+            dialog.StandardButton.Yes | dialog.StandardButton.Cancel)
+        dialog.setDefaultButton(dialog.StandardButton.Yes)
+        if execute(dialog) != dialog.StandardButton.Yes:
+            return
+        delta = timedelta(seconds=offset)
+        for image in images:
+            old_value = image.metadata.date_taken
+            date_taken = dict(old_value)
+            date_taken['datetime'] += delta
+            # keep linked dates linked
+            for key in ('date_digitised', 'date_modified'):
+                if getattr(image.metadata, key) == old_value:
+                    setattr(image.metadata, key, date_taken)
+            image.metadata.date_taken = date_taken
+        self._set_coords_from_gpx(images)
+        self.update_display(selected_images)
 
     @QtSlot()
     @catch_all
@@ -570,6 +706,7 @@ class PhotiniMap(QtWidgets.QWidget):
         self.app.gpx_importer.clear_data()
         self.redraw_gps_track()
         self.widgets['set_from_gpx'].setEnabled(False)
+        self.widgets['fit_gpx'].setEnabled(False)
         self.widgets['clear_gpx'].setEnabled(False)
 
     @QtSlot()
@@ -635,7 +772,14 @@ class PhotiniMap(QtWidgets.QWidget):
 
     @catch_all
     def marker_click(self, marker_id):
-        self.app.image_list.select_images(self.marker_info[marker_id]['images'])
+        info = self.marker_info[marker_id]
+        if len(info['locations']) > 1:
+            # zoom in to expand cluster
+            lats = [x[0] for x in info['locations']]
+            lngs = [x[1] for x in info['locations']]
+            self.JavaScript('adjustBounds({!r},{!r},{!r},{!r})'.format(
+                max(lats), max(lngs), min(lats), min(lngs)))
+        self.app.image_list.select_images(info['images'])
 
     @catch_all
     def marker_drag(self, lat, lng):
@@ -650,8 +794,12 @@ class PhotiniMap(QtWidgets.QWidget):
             gps['exif:GPSLongitude'] = lng
             gps['method'] = 'MANUAL'
             image.metadata.gps_info = gps
+        self._unindex_marker(marker_id)
         info['location'] = [float(image.metadata.gps_info['exif:GPSLatitude']),
                             float(image.metadata.gps_info['exif:GPSLongitude'])]
+        info['key'] = tuple(info['location'])
+        info['locations'] = [info['key']]
+        self.marker_index[info['key']] = marker_id
         self.widgets['latlon'].set_value_list(
             [info['images'][0].metadata.gps_info])
 
@@ -93,7 +93,8 @@ def configure(argv=None):
                ('pixelfed', 'photini.pixelfed',
                 'upload pictures to Pixelfed or Mastodon'),
                ('spelling', None, 'check spelling of metadata'),
-               ('gpxpy', None, 'import GPS track data'),
+               ('gpx', None,
+                'speed up geotagging from GPS tracks (installs numpy)'),
                ('Pillow', None, 'make higher quality thumbnails')]
     if sys.platform != 'win32':
         options.append(
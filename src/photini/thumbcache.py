@@ -0,0 +1,104 @@
+##  Photini - a simple photo metadata editor.
+##  http://github.com/jim-easterbrook/Photini
+##  Copyright (C) 2023  Jim Easterbrook  jim@jim-easterbrook.me.uk
+##
+##  This program is free software: you can redistribute it and/or
+##  modify it under the terms of the GNU General Public License as
+##  published by the Free Software Foundation, either version 3 of the
+##  License, or (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program.  If not, see
+##  <http://www.gnu.org/licenses/>.
+
+import hashlib
+import logging
+import os
+import threading
+
+import appdirs
+
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailCache(object):
+    """Disk cache of thumbnail images (JPEG data) generated for files
+    that don't have one.
+
+    Each file's cache entry name is a hash of its real path, size and
+    modification time, so editing a file automatically invalidates its
+    entry. When the cache exceeds ``max_size`` bytes the least recently
+    used entries are deleted.
+
+    """
+    def __init__(self, max_size=100 * 1024 * 1024):
+        self.max_size = max_size
+        self.root = os.path.join(
+            appdirs.user_cache_dir('photini'), 'thumbnails')
+        os.makedirs(self.root, exist_ok=True)
+        self.lock = threading.Lock()
+        self.total_size = 0
+        for entry in os.scandir(self.root):
+            if entry.is_file():
+                self.total_size += entry.stat().st_size
+
+    def _cache_path(self, path):
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        key = '{}\0{}\0{}'.format(path, stat.st_size, stat.st_mtime_ns)
+        return os.path.join(
+            self.root, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.jpg')
+
+    def get(self, path):
+        try:
+            cache_path = self._cache_path(path)
+            with open(cache_path, 'rb') as f:
+                data = f.read()
+            # record use for LRU eviction
+            os.utime(cache_path)
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            logger.exception(ex)
+            return None
+
+    def put(self, path, data):
+        try:
+            cache_path = self._cache_path(path)
+            tmp_path = cache_path + '.tmp{}'.format(threading.get_ident())
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+        except Exception as ex:
+            logger.exception(ex)
+            return
+        with self.lock:
+            self.total_size += len(data)
+            if self.total_size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        # delete least recently used entries, down to 90% of max_size
+        entries = []
+        self.total_size = 0
+        for entry in os.scandir(self.root):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                self.total_size += stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if self.total_size <= self.max_size * 0.9:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            self.total_size -= size
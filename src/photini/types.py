@@ -84,6 +84,14 @@ class MD_Value(object):
     def compact_form(self):
         return self
 
+    def __reduce__(self):
+        # allow objects to be pickled (e.g. by photini.metadataindex)
+        # by recreating them from the underlying Python type
+        for base in (dict, tuple, str, bytes, Fraction, int, float):
+            if isinstance(self, base):
+                break
+        return self.__class__, (base(self),), self.__dict__ or None
+
     def merge(self, info, tag, other):
         result, merged, ignored = self.merge_item(self, other)
         if ignored:
@@ -574,6 +582,16 @@ class MD_Thumbnail(MD_Dict):
             value['data'] = None
         return value
 
+    def __reduce__(self):
+        # QImage can't be pickled, so store compressed data instead
+        if not self:
+            return self.__class__, (None,)
+        fmt, data = self['fmt'], self['data']
+        if not data:
+            fmt = 'JPEG'
+            data = self.data_from_image(self['image'], max_size=2**32)
+        return self.__class__, ({'fmt': fmt, 'data': data},)
+
     def to_exif(self):
         fmt, data = self['fmt'], self['data']
         if not data:
@@ -1073,13 +1073,11 @@ class PhotiniUploader(QtWidgets.QWidget):
         buttons = {}
         frame = QtWidgets.QFrame()
         frame.setLayout(FormLayout())
+        thumb_size = self.app.image_list.delegate.thumb_w
         for candidate in candidates:
             label = QtWidgets.QLabel()
-            pixmap = candidate.image.pixmap()
-            if pixmap:
-                label.setPixmap(pixmap)
-            else:
-                label.setText(candidate.image.text())
+            label.setFixedSize(thumb_size, thumb_size)
+            candidate.load_thumbnail(label)
             button = QtWidgets.QPushButton(
                 os.path.basename(candidate.path))
             button.setToolTip('<p>' + candidate.path + '</p>')
@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+import pytest
+
+# don't touch the user's Photini config, and run Qt without a display
+os.environ.setdefault('PHOTINI_CONFIG', tempfile.mkdtemp())
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    # modules that use Qt can only be tested if a Qt package is usable
+    pyqt = pytest.importorskip('photini.pyqt', exc_type=ImportError)
+    from photini.configstore import BaseConfigStore
+    app = pyqt.QtWidgets.QApplication.instance()
+    if not app:
+        app = pyqt.QtWidgets.QApplication([])
+    app.config_store = BaseConfigStore('editor')
+    return app
+
+
+@pytest.fixture
+def config(qapp):
+    # set config options for one test
+    saved = {}
+
+    def set_option(section, option, value):
+        saved.setdefault((section, option), qapp.config_store.get(
+            section, option))
+        qapp.config_store.set(section, option, value)
+
+    yield set_option
+    for (section, option), value in saved.items():
+        if value is None:
+            qapp.config_store.delete(section, option)
+        else:
+            qapp.config_store.set(section, option, value)
+
+
+@pytest.fixture
+def jpeg_file(qapp, tmp_path):
+    # small image file with no metadata
+    from photini.pyqt import QtGui
+    path = str(tmp_path / 'image.jpg')
+    image = QtGui.QImage(32, 32, QtGui.QImage.Format.Format_RGB32)
+    image.fill(0x804020)
+    assert image.save(path, 'JPEG')
+    return path
@@ -0,0 +1,223 @@
+import calendar
+import math
+import zipfile
+
+import pytest
+
+
+@pytest.fixture
+def gpx(qapp):
+    import photini.gpximporter
+    return photini.gpximporter
+
+
+def read_track(gpx, path):
+    builder = gpx.TrackBuilder()
+    gpx.get_reader(str(path)).read(str(path), builder)
+    count, arrays, reduced = builder.result()
+    points = list(zip(*arrays))
+    return count, points
+
+
+def utc(*args):
+    return float(calendar.timegm(args))
+
+
+def test_parse_time(gpx):
+    assert gpx.parse_time('2023-04-05T06:07:08Z') == utc(2023, 4, 5, 6, 7, 8)
+    assert gpx.parse_time('2023-04-05 06:07:08') == utc(2023, 4, 5, 6, 7, 8)
+    assert gpx.parse_time('2023/04/05T06:07:08.5') == utc(
+        2023, 4, 5, 6, 7, 8) + 0.5
+    assert gpx.parse_time('2023-04-05T06:07:08+01:30') == utc(
+        2023, 4, 5, 4, 37, 8)
+    assert gpx.parse_time('2023-04-05T06:07:08-0100') == utc(
+        2023, 4, 5, 7, 7, 8)
+    assert gpx.parse_time('not a time') is None
+    assert gpx.parse_time(None) is None
+
+
+def test_get_reader(gpx, tmp_path):
+    assert gpx.get_reader('a.GPX') is gpx.GPXReader
+    assert gpx.get_reader('a.kmz') is gpx.KMLReader
+    assert gpx.get_reader('a.xyz') is gpx.GPXReader
+    # readers of generic extensions check the file content
+    nmea_path = tmp_path / 'track.log'
+    nmea_path.write_text(nmea(
+        'GPRMC,060708.00,A,5130.000,N,00006.000,W,0.0,0.0,050423,,'))
+    assert gpx.get_reader(str(nmea_path)) is gpx.NMEAReader
+    csv_path = tmp_path / 'track.txt'
+    csv_path.write_text('time,lat,lon\n1680674828,51.5,-0.1\n')
+    assert gpx.get_reader(str(csv_path)) is gpx.CSVReader
+    for path in nmea_path, csv_path:
+        path.write_text('Some other text\n')
+        assert gpx.get_reader(str(path)) is None
+    assert gpx.get_reader(str(tmp_path / 'missing.csv')) is None
+
+
+def test_gpx_reader(gpx, tmp_path):
+    path = tmp_path / 'track.gpx'
+    path.write_text("""<?xml version="1.0"?>
+<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">
+ <trk><trkseg>
+  <trkpt lat="51.5" lon="-0.1"><ele>12.5</ele>
+   <time>2023-04-05T06:07:08Z</time></trkpt>
+  <trkpt lat="51.6" lon="-0.2"><time>2023-04-05T06:08:08Z</time></trkpt>
+  <trkpt lat="51.7" lon="-0.3"></trkpt>
+ </trkseg></trk>
+</gpx>
+""")
+    count, points = read_track(gpx, path)
+    assert count == 3
+    assert points[0] == (utc(2023, 4, 5, 6, 7, 8), 51.5, -0.1, 12.5)
+    assert points[1][:3] == (utc(2023, 4, 5, 6, 8, 8), 51.6, -0.2)
+    assert math.isnan(points[1][3])
+    assert len(points) == 2
+
+
+KML = """<?xml version="1.0"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"
+     xmlns:gx="http://www.google.com/kml/ext/2.2">
+ <Document>
+  <Placemark><gx:Track>
+   <when>2023-04-05T06:07:08Z</when>
+   <when>2023-04-05T06:08:08Z</when>
+   <gx:coord>-0.1 51.5 12.5</gx:coord>
+   <gx:coord>-0.2 51.6 13.5</gx:coord>
+  </gx:Track></Placemark>
+  <Placemark>
+   <TimeStamp><when>2023-04-05T07:00:00Z</when></TimeStamp>
+   <Point><coordinates>-0.3,51.7</coordinates></Point>
+  </Placemark>
+  <Placemark><Point><coordinates>-0.4,51.8</coordinates></Point></Placemark>
+ </Document>
+</kml>
+"""
+
+
+def test_kml_reader(gpx, tmp_path):
+    path = tmp_path / 'track.kml'
+    path.write_text(KML)
+    count, points = read_track(gpx, path)
+    assert count == 3
+    assert points[0] == (utc(2023, 4, 5, 6, 7, 8), 51.5, -0.1, 12.5)
+    assert points[1] == (utc(2023, 4, 5, 6, 8, 8), 51.6, -0.2, 13.5)
+    assert points[2][:3] == (utc(2023, 4, 5, 7, 0, 0), 51.7, -0.3)
+
+
+def test_kmz_reader(gpx, tmp_path):
+    path = tmp_path / 'track.kmz'
+    with zipfile.ZipFile(str(path), 'w') as kmz:
+        kmz.writestr('other.kml', '<kml/>')
+        kmz.writestr('doc.kml', KML)
+    count, points = read_track(gpx, path)
+    assert count == 3
+
+
+def nmea(sentence):
+    checksum = 0
+    for c in sentence.encode('ascii'):
+        checksum ^= c
+    return '${}*{:02X}\n'.format(sentence, checksum)
+
+
+def test_nmea_reader(gpx, tmp_path):
+    path = tmp_path / 'track.nmea'
+    path.write_text(''.join((
+        nmea('GPGGA,060708.00,5130.000,N,00006.000,W,1,8,1.0,12.5,M,,M,,'),
+        nmea('GPRMC,060708.00,A,5130.000,N,00006.000,W,0.0,0.0,050423,,'),
+        nmea('GPRMC,060808.50,A,5136.000,S,00012.000,E,0.0,0.0,050423,,'),
+        # void fix and bad checksum are ignored
+        nmea('GPRMC,060908.00,V,5142.000,N,00018.000,W,0.0,0.0,050423,,'),
+        nmea('GPRMC,061008.00,A,5148.000,N,00024.000,W,0.0,0.0,050423,,'
+             )[:-3] + '00\n',
+        )))
+    count, points = read_track(gpx, path)
+    assert count == 2
+    assert points[0] == (utc(2023, 4, 5, 6, 7, 8), 51.5, -0.1, 12.5)
+    assert points[1][:3] == (utc(2023, 4, 5, 6, 8, 8) + 0.5, -51.6, 0.2)
+    assert math.isnan(points[1][3])
+
+
+def test_csv_reader(gpx, tmp_path):
+    path = tmp_path / 'track.csv'
+    path.write_text('Date;Time;Latitude;Longitude;Alt\n'
+                    '2023-04-05;06:07:08;51.5;-0.1;12.5\n'
+                    '2023-04-05;06:08:08;51.6;-0.2;\n'
+                    '2023-04-05;06:09:08;bad;-0.3;\n')
+    count, points = read_track(gpx, path)
+    assert count == 2
+    assert points[0] == (utc(2023, 4, 5, 6, 7, 8), 51.5, -0.1, 12.5)
+    assert points[1][:3] == (utc(2023, 4, 5, 6, 8, 8), 51.6, -0.2)
+    path.write_text('timestamp,lat,lon\n1680674828,51.5,-0.1\n')
+    count, points = read_track(gpx, path)
+    assert points[0][:3] == (1680674828.0, 51.5, -0.1)
+    # no coordinates
+    path.write_text('time,x,y\n1680674828,51.5,-0.1\n')
+    assert not gpx.CSVReader.accepts(str(path))
+    builder = gpx.TrackBuilder()
+    gpx.CSVReader.read(str(path), builder)
+    assert builder.count == 0
+
+
+def test_track_builder(gpx):
+    builder = gpx.TrackBuilder(max_points=10, min_distance=25.0)
+    # points about 11m apart, in a straight line
+    for i in range(1000):
+        builder.add(float(i), 51.0 + (i * 0.0001), 0.0)
+    count, arrays, reduced = builder.result()
+    assert count == 1000
+    assert len(arrays[0]) == 1000
+    assert 0 < len(reduced) <= 10
+    assert reduced[0] == (0.0, 51.0, 0.0)
+    assert reduced == sorted(reduced)
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def track(request, gpx, config, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(gpx, 'numpy', None)
+    config('map', 'gpx_max_gap', 600)
+    config('map', 'gpx_max_offset', 1800)
+    importer = gpx.GpxImporter()
+    # moving north at about 11 m/s, stopped from 1000 to 1100 and
+    # from 3000 to 3100
+    times, lats = [], []
+    lat = 51.0
+    for t in range(0, 5000, 10):
+        times.append(float(t))
+        lats.append(lat)
+        if not (1000 <= t < 1100 or 3000 <= t < 3100):
+            lat += 0.001
+    importer.add_points(times, lats, [0.0] * len(times),
+                        [math.nan] * len(times))
+    return importer
+
+
+def test_get_locations_at(track):
+    assert track.get_locations_at([-1.0, 5.0, 5000.0]) == [
+        None, (51.0005, 0.0, None), None]
+
+
+def test_fit_offset_known(track):
+    # photographs with coordinates, camera clock 137 seconds slow
+    utc_times = [500.0, 2000.0, 4000.0]
+    known = [x[:2] for x in track.get_locations_at(utc_times)]
+    utc_times = [x - 137.0 for x in utc_times]
+    assert track.fit_offset(utc_times, known) == 137
+
+
+def test_fit_offset_stopped(track):
+    # photographs taken while stopped, camera clock 300 seconds slow
+    utc_times = [1050.0 - 300.0, 3050.0 - 300.0]
+    offset = track.fit_offset(utc_times)
+    assert 250 <= offset <= 350
+    for lat, lng, ele in track.get_locations_at(
+            [x + offset for x in utc_times]):
+        assert round(lat, 6) in (51.1, 51.29)
+
+
+def test_fit_offset_no_overlap(track):
+    assert track.fit_offset([100000.0]) is None
+    assert track.fit_offset([]) is None
@@ -0,0 +1,60 @@
+import pytest
+
+
+@pytest.fixture
+def model(qapp):
+    from photini.imagelist import ThumbnailModel
+    model = ThumbnailModel([])
+    model.inserted = []
+    model.rowsInserted.connect(
+        lambda parent, first, last: model.inserted.append((first, last)))
+    return model
+
+
+class Image(object):
+    def __init__(self, name):
+        self.name = name
+        self.path = '/' + name
+
+
+def key(image):
+    return image.name
+
+
+def names(model):
+    return ''.join(x.name for x in model.images)
+
+
+def test_insert_images(model):
+    model.insert_images([Image(x) for x in 'dbf'], key)
+    assert names(model) == 'bdf'
+    assert model.inserted == [(0, 2)]
+    model.inserted = []
+    # adjacent rows are inserted together
+    model.insert_images([Image(x) for x in 'eaccg'], key)
+    assert names(model) == 'abccdefg'
+    assert model.inserted == [(3, 3), (2, 2), (1, 2), (0, 0)]
+    assert [model.row(x) for x in model.images] == list(range(8))
+
+
+def test_insert_images_after_edit(model):
+    images = [Image(x) for x in 'bdf']
+    model.insert_images(images, key)
+    # key of an image changes after the list is sorted
+    images[0].name = 'g'
+    model.insert_images([Image('c')], key)
+    assert names(model) == 'cdfg'
+    assert [model.row(x) for x in model.images] == list(range(4))
+
+
+def test_sort_images(model):
+    from photini.pyqt import QtCore
+    images = [Image(x) for x in 'abc']
+    model.insert_images(images, key)
+    index = QtCore.QPersistentModelIndex(model.index(0))
+    images[0].name = 'd'
+    model.sort_images(key)
+    assert names(model) == 'bcd'
+    # persistent index still refers to the same image
+    assert index.row() == 2
+    assert model.data(model.index(index.row())) == 'd'
@@ -0,0 +1,276 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def importer(qapp):
+    import photini.importer
+    return photini.importer
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_folder_partial_hash(importer, tmp_path):
+    from photini.importledger import file_partial_hash
+    path = write_file(str(tmp_path / 'src' / 'a.jpg'), os.urandom(5000))
+    source = importer.FolderSource(str(tmp_path / 'src'))
+    info = source.get_file_data()['a.jpg']
+    assert info['size'] == 5000
+    assert source.partial_hash(info) == file_partial_hash(path)[1]
+    # cached until the file changes
+    assert len(source.hashes) == 1
+    write_file(path, os.urandom(6000))
+    assert source.partial_hash(info) == file_partial_hash(path)[1]
+    assert len(source.hashes) == 2
+    os.unlink(path)
+    assert source.partial_hash(info) is None
+
+
+class FakeCamera(object):
+    # enough of gphoto2's Camera to test CameraSource
+    def __init__(self, files):
+        self.files = files
+        self.calls = []
+
+    def set_port_info(self, info):
+        pass
+
+    def init(self):
+        self.calls.append('init')
+
+    def exit(self):
+        self.calls.append('exit')
+
+    def get_abilities(self):
+        return type('abilities', (), {'model': 'Fake camera'})
+
+    def folder_list_files(self, path):
+        return [(name, None) for (folder, name) in self.files
+                if folder == path]
+
+    def folder_list_folders(self, path):
+        result = set()
+        for folder, name in self.files:
+            while folder != '/':
+                folder, child = os.path.split(folder)
+                if folder == path:
+                    result.add(child)
+        return [(name, None) for name in sorted(result)]
+
+    def file_get_info(self, folder, name):
+        self.calls.append('file_get_info')
+        info = type('file', (), {
+            'mtime': 1600000000, 'size': len(self.files[folder, name])})
+        return type('info', (), {'file': info})
+
+    def file_read(self, folder, name, file_type, offset, buf):
+        self.calls.append('file_read')
+        data = self.files[folder, name][offset:offset + len(buf)]
+        buf[:len(data)] = data
+        return len(data)
+
+
+@pytest.fixture
+def camera(importer, monkeypatch):
+    camera = FakeCamera({
+        ('/DCIM/100', 'IMG_0001.JPG'): os.urandom(3000),
+        ('/DCIM/100', 'IMG_0002.JPG'): os.urandom(4000),
+        ('/DCIM/100', 'notes.txt'): b'abc',
+        })
+    port_info = type('PortInfoList', (list,), {
+        'load': lambda self: None, 'lookup_path': lambda self, x: 0})
+    gp = type('gp', (), {
+        'Camera': lambda: camera, 'PortInfoList': lambda: port_info([None]),
+        'GPhoto2Error': type('GPhoto2Error', (Exception,), {}),
+        'GP_FILE_TYPE_NORMAL': 1})
+    monkeypatch.setattr(importer, 'gp', gp)
+    return camera
+
+
+def test_camera_lazy_info(importer, camera, tmp_path):
+    from photini.importledger import ImportLedger
+    source = importer.CameraSource('Fake camera', 'usb:001,002')
+    file_data = source.get_file_data()
+    assert sorted(file_data) == ['IMG_0001.JPG', 'IMG_0002.JPG']
+    assert camera.calls == ['init']
+    # only the file that matches the ledger by name is read
+    ledger = ImportLedger(path=str(tmp_path / 'imports.db'))
+    ledger.add('IMG_0002.JPG', 4000, 'abc', None, '/a/IMG_0002.JPG')
+    assert not ledger.is_imported(file_data['IMG_0001.JPG'], source)
+    assert camera.calls == ['init']
+    assert not ledger.is_imported(file_data['IMG_0002.JPG'], source)
+    assert camera.calls == ['init', 'file_get_info', 'file_read']
+    # info is cached while folder listing is unchanged
+    file_data = source.get_file_data()
+    assert file_data['IMG_0002.JPG']['size'] == 4000
+    assert file_data['IMG_0002.JPG']['timestamp']
+    assert camera.calls == ['init', 'file_get_info', 'file_read']
+    source.close()
+    assert camera.calls[-1] == 'exit'
+
+
+def test_camera_short_read(importer, camera):
+    source = importer.CameraSource('Fake camera', 'usb:001,002')
+    info = source.get_file_data()['IMG_0001.JPG']
+    assert info['size'] == 3000
+    camera.files['/DCIM/100', 'IMG_0001.JPG'] = b'short'
+    assert source.partial_hash(info) is None
+
+
+def test_copy_file(importer, tmp_path):
+    src = write_file(str(tmp_path / 'src' / 'a.jpg'), os.urandom(10000))
+    os.utime(src, (1600000000, 1600000000))
+    os.makedirs(str(tmp_path / 'dest'))
+    dest = str(tmp_path / 'dest' / 'b.jpg')
+    checksum = importer.copy_file(src, dest)
+    assert checksum == importer._file_checksum(src)
+    assert open(dest, 'rb').read() == open(src, 'rb').read()
+    assert os.path.getmtime(dest) == 1600000000
+    assert os.listdir(str(tmp_path / 'dest')) == ['b.jpg']
+    # without verification
+    os.unlink(dest)
+    assert importer.copy_file(src, dest, verify=False) is None
+    assert open(dest, 'rb').read() == open(src, 'rb').read()
+
+
+def test_copy_file_short_kernel_copy(importer, tmp_path, monkeypatch):
+    data = os.urandom(10000)
+    src = write_file(str(tmp_path / 'src' / 'a.jpg'), data)
+    os.makedirs(str(tmp_path / 'dest'))
+    dest = str(tmp_path / 'dest' / 'a.jpg')
+
+    def copy_file_range(src, dst, count):
+        # copy some of the data, then report end of file
+        if os.fstat(dst).st_size:
+            return 0
+        return os.write(dst, os.read(src, 3000))
+
+    monkeypatch.setattr(os, 'copy_file_range', copy_file_range,
+                        raising=False)
+    monkeypatch.setattr(os, 'sendfile', lambda *args: 0, raising=False)
+    assert importer.copy_file(src, dest, verify=False) is None
+    assert open(dest, 'rb').read() == data
+
+
+def test_copy_file_bad_checksum(importer, tmp_path, monkeypatch):
+    src = write_file(str(tmp_path / 'src' / 'a.jpg'), os.urandom(10000))
+    os.makedirs(str(tmp_path / 'dest'))
+    dest = str(tmp_path / 'dest' / 'a.jpg')
+    monkeypatch.setattr(importer, '_file_checksum', lambda path: 'bad')
+    with pytest.raises(OSError):
+        importer.copy_file(src, dest)
+    # partial copy is deleted, and source isn't moved
+    assert os.listdir(str(tmp_path / 'dest')) == []
+    # make move_file copy as if to another file system
+    stat = os.stat
+    monkeypatch.setattr(os, 'stat', lambda path: SimpleNamespace(
+        st_dev=path) if path == os.path.dirname(dest) else stat(path))
+    with pytest.raises(OSError):
+        importer.move_file(src, dest)
+    assert os.listdir(str(tmp_path / 'dest')) == []
+    assert os.path.exists(src)
+
+
+def test_move_file(importer, tmp_path):
+    data = os.urandom(10000)
+    src = write_file(str(tmp_path / 'src' / 'a.jpg'), data)
+    os.makedirs(str(tmp_path / 'dest'))
+    dest = str(tmp_path / 'dest' / 'a.jpg')
+    # same file system, so file is renamed
+    assert importer.move_file(src, dest) is None
+    assert not os.path.exists(src)
+    assert open(dest, 'rb').read() == data
+
+
+def test_folder_copy_files(importer, config, tmp_path):
+    config('importer', 'copy_workers', 3)
+    config('importer', 'verify_copy', True)
+    source = importer.FolderSource(str(tmp_path / 'src'))
+    info_list = []
+    for n in range(20):
+        name = 'IMG_{:04d}.JPG'.format(n)
+        path = write_file(str(tmp_path / 'src' / name), os.urandom(1000 + n))
+        sc_path = None
+        if n == 3:
+            sc_path = write_file(path + '.xmp', b'<x/>')
+        info_list.append({
+            'path': path, 'sc_path': sc_path, 'name': name,
+            'dest_path': str(tmp_path / 'dest' / str(n) / name)})
+    # results are in the same order as the input
+    result = list(source.copy_files(info_list, False))
+    assert [x['name'] for x in result] == [x['name'] for x in info_list]
+    for info in result:
+        assert info['checksum'] == importer._file_checksum(info['path'])
+        assert (open(info['dest_path'], 'rb').read() ==
+                open(info['path'], 'rb').read())
+    assert os.path.exists(info_list[3]['dest_path'] + '.xmp')
+
+
+@pytest.fixture
+def scanned(importer, monkeypatch):
+    # record files read by FolderSource
+    scanned = []
+
+    def scan_file(path):
+        scanned.append(os.path.basename(path))
+        return dict.fromkeys(('camera_model', 'date_digitised',
+                              'date_modified', 'date_taken'))
+
+    monkeypatch.setattr(importer, 'scan_file', scan_file)
+    return scanned
+
+
+def test_folder_listing(importer, scanned, tmp_path):
+    root = str(tmp_path / 'src')
+    write_file(os.path.join(root, 'a.jpg'), b'a')
+    write_file(os.path.join(root, 'notes.txt'), b'x')
+    write_file(os.path.join(root, 'sub', 'b.jpg'), b'b')
+    write_file(os.path.join(root, '.thumbs', 'c.jpg'), b'c')
+    source = importer.FolderSource(root)
+    file_data = source.get_file_data()
+    assert sorted(file_data) == ['a.jpg', 'b.jpg']
+    assert file_data['b.jpg']['size'] == 1
+    assert sorted(scanned) == ['a.jpg', 'b.jpg']
+    # unchanged files aren't read again
+    del scanned[:]
+    assert source.get_file_data() == file_data
+    assert scanned == []
+    # new, changed, and files with new sidecars are read
+    write_file(os.path.join(root, 'sub', 'b.jpg'), b'bb')
+    write_file(os.path.join(root, 'sub', 'd.jpg'), b'd')
+    write_file(os.path.join(root, 'a.xmp'), b'<x/>')
+    file_data = source.get_file_data()
+    assert sorted(scanned) == ['a.jpg', 'b.jpg', 'd.jpg']
+    assert file_data['b.jpg']['size'] == 2
+    assert file_data['a.jpg']['sc_path'] == os.path.join(root, 'a.xmp')
+    # removed directories are dropped from the cache
+    for name in ('b.jpg', 'd.jpg'):
+        os.unlink(os.path.join(root, 'sub', name))
+    os.rmdir(os.path.join(root, 'sub'))
+    assert sorted(source.get_file_data()) == ['a.jpg']
+    assert list(source.dir_cache) == [root]
+
+
+def test_folder_watch(importer, scanned, config, tmp_path):
+    config('importer', 'watch_folders', True)
+    root = str(tmp_path / 'src')
+    write_file(os.path.join(root, 'a.jpg'), b'a')
+    source = importer.FolderSource(root)
+    assert sorted(source.get_file_data()) == ['a.jpg']
+    assert source.watched == {root}
+    # directories are only listed again when the watcher says they've
+    # changed, and the watcher's signal isn't delivered in this test
+    write_file(os.path.join(root, 'b.jpg'), b'b')
+    assert sorted(source.get_file_data()) == ['a.jpg']
+    source.changed_dirs.add(root)
+    assert sorted(source.get_file_data()) == ['a.jpg', 'b.jpg']
+    assert scanned == ['a.jpg', 'b.jpg']
+    source.close()
+    assert not source.watched
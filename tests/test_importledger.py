@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+from photini.importledger import (
+    CHUNK_SIZE, ImportLedger, file_partial_hash, partial_hash)
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return ImportLedger(path=str(tmp_path / 'imports.db'))
+
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_partial_hash():
+    assert partial_hash(4, b'ab', b'cd') == partial_hash(4, b'ab', b'cd')
+    assert partial_hash(4, b'ab', b'cd') != partial_hash(5, b'ab', b'cd')
+    assert partial_hash(4, b'ab', b'cd') != partial_hash(4, b'ab', b'ce')
+
+
+def test_small_file(tmp_path):
+    data = os.urandom(1000)
+    path = write_file(tmp_path / 'a.jpg', data)
+    assert file_partial_hash(path) == (1000, partial_hash(1000, data, b''))
+
+
+def test_large_file(tmp_path):
+    size = (CHUNK_SIZE * 3) + 7
+    data = bytearray(os.urandom(size))
+    path = write_file(tmp_path / 'a.jpg', data)
+    result = file_partial_hash(path)
+    assert result == (size, partial_hash(
+        size, data[:CHUNK_SIZE], data[-CHUNK_SIZE:]))
+    # change in the middle isn't detected
+    data[CHUNK_SIZE + 10] ^= 0xff
+    path = write_file(tmp_path / 'b.jpg', data)
+    assert file_partial_hash(path) == result
+    # change at the end is
+    data[-1] ^= 0xff
+    path = write_file(tmp_path / 'c.jpg', data)
+    assert file_partial_hash(path) != result
+
+
+def test_file_just_over_chunk(tmp_path):
+    # end chunk mustn't overlap start chunk
+    size = CHUNK_SIZE + 10
+    data = os.urandom(size)
+    path = write_file(tmp_path / 'a.jpg', data)
+    assert file_partial_hash(path) == (size, partial_hash(
+        size, data[:CHUNK_SIZE], data[CHUNK_SIZE:]))
+
+
+def test_find(ledger):
+    assert ledger.find('IMG_0001.JPG') == []
+    ledger.add('IMG_0001.JPG', 1000, 'abc', None, '/a/IMG_0001.JPG')
+    ledger.add('IMG_0001.JPG', 2000, 'def', 'full', '/b/IMG_0001.JPG')
+    ledger.add('IMG_0002.JPG', 1000, 'abc', None, '/a/IMG_0002.JPG')
+    assert sorted(ledger.find('IMG_0001.JPG')) == [
+        (1000, 'abc', None), (2000, 'def', 'full')]
+    assert ledger.find('img_0001.jpg') == []
+
+
+def test_persistent(tmp_path):
+    path = str(tmp_path / 'imports.db')
+    ImportLedger(path=path).add('a.jpg', 10, 'abc', None, '/a.jpg')
+    assert ImportLedger(path=path).find('a.jpg') == [(10, 'abc', None)]
+
+
+def test_name_lookup_uses_index(ledger):
+    plan = ledger.connection().execute(
+        'EXPLAIN QUERY PLAN SELECT size, partial, full FROM imported'
+        ' WHERE name = ?', ('a.jpg',)).fetchall()
+    assert 'imported_name' in str(plan)
+
+
+class Source(object):
+    def __init__(self, partial, full=None):
+        self.partial = partial
+        self.full = full
+        self.calls = []
+
+    def partial_hash(self, info):
+        self.calls.append('partial_hash')
+        return self.partial
+
+    def file_checksum(self, info):
+        self.calls.append('file_checksum')
+        return self.full
+
+
+def test_is_imported(ledger):
+    ledger.add('a.jpg', 1000, 'abc', 'full', '/x/a.jpg')
+    info = {'name': 'a.jpg', 'size': 1000}
+    source = Source('abc', 'full')
+    assert ledger.is_imported(info, source)
+    assert source.calls == ['partial_hash']
+    assert ledger.is_imported(info, source, full_hash=True)
+    assert not ledger.is_imported(info, Source('abd'))
+    assert not ledger.is_imported(info, Source('abc', 'other'), full_hash=True)
+
+
+def test_is_imported_cheap_checks_first(ledger):
+    ledger.add('a.jpg', 1000, 'abc', None, '/x/a.jpg')
+    source = Source('abc')
+    # different name or size, so no file data read
+    assert not ledger.is_imported({'name': 'b.jpg', 'size': 1000}, source)
+    assert not ledger.is_imported({'name': 'a.jpg', 'size': 999}, source)
+    assert source.calls == []
+    # no full checksum to compare with
+    assert ledger.is_imported(
+        {'name': 'a.jpg', 'size': 1000}, source, full_hash=True)
+    assert source.calls == ['partial_hash']
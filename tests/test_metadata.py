@@ -0,0 +1,37 @@
+def test_unverified(jpeg_file):
+    from photini.metadata import Metadata
+    md = Metadata(jpeg_file)
+    # not saved yet
+    assert md.unverified == []
+    md.title = 'title'
+    md.save(verify='background')
+    assert [x[0] for x in md.unverified] == [jpeg_file]
+    md.title = 'new title'
+    md.save(verify='full')
+    assert md.unverified == []
+
+
+def test_lazy(jpeg_file, tmp_path):
+    from photini.metadata import Metadata
+    from photini.metadataindex import MetadataIndex
+    md = Metadata(jpeg_file)
+    md.title = 'title'
+    md.save()
+    index = MetadataIndex(path=str(tmp_path / 'metadata.db'))
+    md = Metadata(jpeg_file, index=index, lazy=True)
+    # items are read when first used
+    assert 'title' not in vars(md)
+    assert list(md.title.values()) == ['title']
+    assert 'title' in vars(md)
+    assert 'rating' not in vars(md)
+    # index entry is only written when every item has been read
+    assert index.get(jpeg_file, None) is None
+    md.materialise()
+    assert 'rating' in vars(md)
+    assert index.get(jpeg_file, None)['fields']['title'] == md.title
+    # editing a lazy object works as usual
+    md = Metadata(jpeg_file, lazy=True)
+    md.title = 'other title'
+    assert md.changed()
+    md.save()
+    assert list(Metadata(jpeg_file).title.values()) == ['other title']
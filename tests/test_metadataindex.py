@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from photini.metadataindex import MetadataIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    return MetadataIndex(path=str(tmp_path / 'metadata.db'))
+
+
+def write_file(path, data, times=None):
+    with open(path, 'wb') as f:
+        f.write(data)
+    if times:
+        os.utime(path, ns=times)
+
+
+def test_round_trip(tmp_path, index):
+    path = str(tmp_path / 'a.jpg')
+    write_file(path, b'abcd')
+    assert index.get(path, None) is None
+    index.put(path, None, {'title': 'one'})
+    assert index.get(path, None) == {'title': 'one'}
+
+
+def test_changed_size(tmp_path, index):
+    path = str(tmp_path / 'a.jpg')
+    write_file(path, b'abcd')
+    index.put(path, None, {'title': 'one'})
+    write_file(path, b'abcde')
+    assert index.get(path, None) is None
+
+
+def test_preserved_timestamps(tmp_path, index):
+    # a save that keeps the size and restores the file times
+    path = str(tmp_path / 'a.jpg')
+    times = (1600000000 * 10**9, 1600000000 * 10**9)
+    write_file(path, b'abcd', times)
+    index.put(path, None, {'title': 'one'})
+    write_file(path, b'wxyz', times)
+    assert os.stat(path).st_mtime_ns == times[1]
+    assert index.get(path, None) is None
+
+
+def test_sidecar_changed(tmp_path, index):
+    path = str(tmp_path / 'a.jpg')
+    sc_path = str(tmp_path / 'a.xmp')
+    write_file(path, b'abcd')
+    write_file(sc_path, b'<x/>', (10**18, 10**18))
+    index.put(path, sc_path, {'title': 'one'})
+    assert index.get(path, sc_path) == {'title': 'one'}
+    write_file(sc_path, b'<y/>', (10**18, 10**18))
+    assert index.get(path, sc_path) is None
+
+
+def test_remove(tmp_path, index):
+    path = str(tmp_path / 'a.jpg')
+    write_file(path, b'abcd')
+    index.put(path, None, {'title': 'one'})
+    index.remove(path)
+    assert index.get(path, None) is None
+
+
+def test_save_invalidates_entry(index, jpeg_file):
+    from photini.metadata import Metadata
+    path = jpeg_file
+    md = Metadata(path)
+    md.title = 'first title'
+    md.save()
+    os.utime(path, (1600000000, 1600000000))
+    file_times = os.path.getatime(path), os.path.getmtime(path)
+    size = os.path.getsize(path)
+    md = Metadata(path, index=index)
+    assert index.get(path, md.find_sidecar()) is not None
+    # new value is same length, so file size is unchanged
+    md.title = 'other title'
+    md.save(file_times=file_times)
+    assert not md.changed()
+    assert os.path.getsize(path) == size
+    assert os.path.getmtime(path) == file_times[1]
+    md = Metadata(path, index=index)
+    assert list(md.title.values()) == ['other title']
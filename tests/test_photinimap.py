@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def cluster(qapp, config):
+    from photini.photinimap import PhotiniMap
+    config('map', 'cluster_markers', True)
+
+    def cluster(locations, zoom):
+        widget = SimpleNamespace(map_status={'zoom': zoom}, app=qapp)
+        result = PhotiniMap.cluster_locations(widget, locations)
+        return sorted(sorted(x) for x in result)
+
+    return cluster
+
+
+# two places about 100 m apart, and one about 50 km away
+LOCATIONS = [(51.5, -0.1), (51.5009, -0.1), (51.9, -0.5)]
+
+
+def test_cluster_zoom(cluster):
+    assert cluster(LOCATIONS, 18) == [[x] for x in sorted(LOCATIONS)]
+    assert cluster(LOCATIONS, 10) == [LOCATIONS[:2], LOCATIONS[2:]]
+    assert cluster(LOCATIONS, 2) == [LOCATIONS]
+
+
+def test_cluster_disabled(cluster, config):
+    assert cluster(LOCATIONS, None) == [[x] for x in sorted(LOCATIONS)]
+    config('map', 'cluster_markers', False)
+    assert cluster(LOCATIONS, 2) == [[x] for x in sorted(LOCATIONS)]
+
+
+def test_cluster_extremes(cluster):
+    # locations near the poles and either side of 180 degrees
+    locations = [(89.9, 0.0), (-89.9, 0.0), (0.0, 179.99), (0.0, -179.99)]
+    assert cluster(locations, 2) == [[x] for x in sorted(locations)]
@@ -0,0 +1,57 @@
+import os
+
+import appdirs
+import pytest
+
+from photini.thumbcache import ThumbnailCache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        appdirs, 'user_cache_dir', lambda *args: str(tmp_path / 'cache'))
+    return str(tmp_path / 'cache' / 'thumbnails')
+
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_round_trip(tmp_path, cache_dir):
+    cache = ThumbnailCache()
+    path = write_file(tmp_path / 'a.jpg', b'image')
+    assert cache.get(path) is None
+    cache.put(path, b'thumb')
+    assert cache.get(path) == b'thumb'
+    assert len(os.listdir(cache_dir)) == 1
+    # entries are kept between sessions
+    assert ThumbnailCache().get(path) == b'thumb'
+    assert ThumbnailCache().total_size == 5
+
+
+def test_file_changed(tmp_path, cache_dir):
+    cache = ThumbnailCache()
+    path = write_file(tmp_path / 'a.jpg', b'image')
+    cache.put(path, b'thumb')
+    write_file(path, b'new image')
+    assert cache.get(path) is None
+    os.unlink(path)
+    assert cache.get(path) is None
+
+
+def test_eviction(tmp_path, cache_dir):
+    cache = ThumbnailCache(max_size=1000)
+    paths = [write_file(tmp_path / (x + '.jpg'), x.encode('ascii'))
+             for x in 'abc']
+    cache.put(paths[0], b'a' * 400)
+    cache.put(paths[1], b'b' * 400)
+    os.utime(cache._cache_path(paths[0]), (1000, 1000))
+    os.utime(cache._cache_path(paths[1]), (2000, 2000))
+    # using an entry makes it the most recently used
+    assert cache.get(paths[0])
+    cache.put(paths[2], b'c' * 400)
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[0]) and cache.get(paths[2])
+    assert cache.total_size == 800